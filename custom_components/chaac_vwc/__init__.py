@@ -2,28 +2,65 @@ from __future__ import annotations
 
 from datetime import timedelta
 import logging
+import math
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     CONF_ENABLED, CONF_STATION, CONF_ACCESS_ID, CONF_ACCESS_KEY,
     CONF_POLL_SECONDS, CONF_KEEP_DAYS,
     CONF_SENSOR_SOURCE, CONF_MOIST_ENTITY, CONF_TEMP_ENTITY, CONF_EC_ENTITY,
-    CONF_PLUG_ENABLED, CONF_PLUG_HOST, CONF_PLUG_ID, CONF_PLUG_USER, CONF_PLUG_PASS,
+    CONF_PLUG_ENABLED, CONF_PLUG_HOST, CONF_PLUG_ID,
     CONF_ML_PER_SEC, CONF_PUMP_SECONDS,
+    CONF_DEVICE_EUI, CONF_CHANNEL_INDEX, CONF_FLEET_DEVICES,
+)
+from .controller import (
+    BinarySampleLogger,
+    PumpEvent,
+    SenseCapVwcControllerSingle,
+    async_close_fetch_cache,
+    async_close_shelly_session,
+    async_get_shelly_session,
+    async_remove_entry_logs,
 )
-from .controller import SenseCapVwcControllerSingle, shelly_set_switch
+from .fleet import FleetPoller, parse_fleet_devices
 from .storage import SenseCapStateStore
 
 PLATFORMS = ["sensor", "button"]
 
 LOGGER = logging.getLogger(__name__)
 
+ATTR_ENTRY_ID = "entry_id"
+SAMPLE_SERVICES = ("export_samples", "query_samples")
+
+EXPORT_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional("date"): cv.date,
+    }
+)
+
+QUERY_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("resolution", default="raw"): vol.In(["raw", "hourly", "daily"]),
+        vol.Optional("limit", default=1000): vol.All(vol.Coerce(int), vol.Range(min=1, max=10000)),
+    }
+)
+
 
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     await hass.config_entries.async_reload(entry.entry_id)
@@ -41,11 +78,77 @@ def _to_float_from_state(state_obj):
         return None
 
 
+def _controller_for_call(hass: HomeAssistant, call: ServiceCall) -> SenseCapVwcControllerSingle:
+    """Controller of the entry named by entry_id; optional while only one entry is loaded."""
+    entries = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_ENTRY_ID)
+    if entry_id:
+        if entry_id not in entries:
+            raise HomeAssistantError(f"{call.service}: no loaded {DOMAIN} entry {entry_id}")
+        return entries[entry_id]["controller"]
+    if len(entries) != 1:
+        raise HomeAssistantError(f"{call.service}: entry_id is required with {len(entries)} loaded entries")
+    return next(iter(entries.values()))["controller"]
+
+
+def _as_utc(value, default):
+    if value is None:
+        return default
+    return dt_util.as_utc(value if value.tzinfo else value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE))
+
+
+@callback
+def _async_register_sample_services(hass: HomeAssistant) -> None:
+    """Domain-wide services, registered once; the entry comes from the call (entry_id)."""
+    if hass.services.has_service(DOMAIN, "query_samples"):
+        return
+
+    async def _svc_export_samples(call: ServiceCall) -> None:
+        logger = _controller_for_call(hass, call).sample_logger
+        if not isinstance(logger, BinarySampleLogger):
+            LOGGER.debug("Export samples: sampleFormat is jsonl, files are already JSONL")
+            return
+        day = dt_util.as_local(dt_util.utcnow())
+        parsed = call.data.get("date")
+        if parsed is not None:
+            day = day.replace(year=parsed.year, month=parsed.month, day=parsed.day)
+        path = await logger.async_export_jsonl(day)
+        LOGGER.info("Export samples: %s", path or f"no samples for {day.date()}")
+
+    async def _svc_query_samples(call: ServiceCall) -> ServiceResponse:
+        controller = _controller_for_call(hass, call)
+        end = _as_utc(call.data.get("end"), dt_util.utcnow())
+        start = _as_utc(call.data.get("start"), end - timedelta(hours=24))
+        limit = call.data["limit"]
+        start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+        resolution = call.data["resolution"]
+        if resolution in ("hourly", "daily"):
+            return {"samples": (await controller.rollups.async_query(resolution, start_ms, end_ms))[:limit]}
+
+        samples: list[dict] = []
+        async for row in controller.sample_logger.async_iter_range(start_ms, end_ms):
+            samples.append(row)
+            if len(samples) >= limit:
+                break
+        return {"samples": samples}
+
+    hass.services.async_register(DOMAIN, "export_samples", _svc_export_samples, schema=EXPORT_SAMPLES_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        "query_samples",
+        _svc_query_samples,
+        schema=QUERY_SAMPLES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     session = async_get_clientsession(hass)
+    shelly_session = async_get_shelly_session(hass)
     d = entry.data
 
-    store = SenseCapStateStore(hass)
+    store = SenseCapStateStore(hass, entry.entry_id)
     await store.async_load()
 
     controller = SenseCapVwcControllerSingle(
@@ -59,34 +162,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         enabled=bool(d.get(CONF_ENABLED, True)),
         cfg=d,
         persisted_state=store.state,
+        shelly_session=shelly_session,
+        entry_id=entry.entry_id,
+        save_state=store.async_flush,
     )
 
-    # If configured to use HA entity as sensor source: listen to changes and run decision immediately.
-    controller._unsub_state_listener = None  # type: ignore[attr-defined]
-    if str(d.get(CONF_SENSOR_SOURCE, "sensecap_cloud")) == "ha_entity":
-        moist_ent = str(d.get(CONF_MOIST_ENTITY, "")).strip()
-        temp_ent = str(d.get(CONF_TEMP_ENTITY, "")).strip()
-        ec_ent = str(d.get(CONF_EC_ENTITY, "")).strip()
-
-        @callback
-        def _handle(event):
-            if event.data.get("entity_id") != moist_ent:
-                return
-            vwc = _to_float_from_state(event.data.get("new_state"))
-            if vwc is None:
-                return
-            t = _to_float_from_state(hass.states.get(temp_ent)) if temp_ent else None
-            ec = _to_float_from_state(hass.states.get(ec_ent)) if ec_ent else None
-            sample = {"t": int(hass.loop.time() * 1000), "moist": vwc}
-            if t is not None:
-                sample["temp"] = t
-            if ec is not None:
-                sample["ec"] = ec
-            hass.async_create_task(controller.on_external_sample(sample))
-
-        if moist_ent:
-            controller._unsub_state_listener = async_track_state_change_event(hass, [moist_ent], _handle)
-
     async def _async_update():
         try:
             # Some older installs had a controller without poll_once (bad cache/mix).
@@ -100,10 +180,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                     "pollSeconds": int(d.get(CONF_POLL_SECONDS, 60)),
                     "last": dict(getattr(store.state, "last_sample", {}) or {}),
                 }
-            await store.async_save()
+            store.async_schedule_save()
             return data
         except Exception as e:
             raise UpdateFailed(str(e)) from e
+        finally:
+            # adaptivePoll / windowPolling: next poll just after the expected upload or at the next
+            # window start; also after a failed poll, so an off-window interval can't outlive it
+            try:
+                delay = controller.next_poll_seconds()
+            except Exception as e:
+                LOGGER.debug("Next poll delay failed (%s), using pollSeconds", e)
+                delay = controller.poll_seconds
+            coordinator.update_interval = timedelta(seconds=delay)
 
     coordinator = DataUpdateCoordinator(
         hass,
@@ -113,17 +202,76 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         update_interval=timedelta(seconds=max(10, int(d.get(CONF_POLL_SECONDS, 60) or 60))),
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await controller.async_setup()
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        # not ready (HA retries) or broken: release the log writers and the pump db, and start
+        # the timers/listeners only once setup can no longer fail
+        await controller.async_shutdown()
+        await store.async_flush()
+        if not hass.data.get(DOMAIN):
+            await async_close_fetch_cache(hass)
+            await async_close_shelly_session(hass)
+        raise
+    controller.async_start()
+
+    # If configured to use HA entity as sensor source: listen to changes and run decision immediately.
+    controller._unsub_state_listener = None  # type: ignore[attr-defined]
+    if str(d.get(CONF_SENSOR_SOURCE, "sensecap_cloud")) == "ha_entity":
+        moist_ent = str(d.get(CONF_MOIST_ENTITY, "")).strip()
+        temp_ent = str(d.get(CONF_TEMP_ENTITY, "")).strip()
+        ec_ent = str(d.get(CONF_EC_ENTITY, "")).strip()
+
+        @callback
+        def _handle(event):
+            if event.data.get("entity_id") != moist_ent:
+                return
+            vwc = _to_float_from_state(event.data.get("new_state"))
+            if vwc is None:
+                return
+            t = _to_float_from_state(hass.states.get(temp_ent)) if temp_ent else None
+            ec = _to_float_from_state(hass.states.get(ec_ent)) if ec_ent else None
+            sample = {"t": int(dt_util.utcnow().timestamp() * 1000), "moist": vwc}
+            if t is not None:
+                sample["temp"] = t
+            if ec is not None:
+                sample["ec"] = ec
+            hass.async_create_task(controller.on_external_sample(sample))
+
+        if moist_ent:
+            controller._unsub_state_listener = async_track_state_change_event(hass, [moist_ent], _handle)
+
+    # Fleet mode: more devices of the same account, staggered over pollSeconds on the same client.
+    fleet = None
+    if controller.client is not None and str(d.get(CONF_FLEET_DEVICES, "") or "").strip():
+        devices = parse_fleet_devices(
+            str(d.get(CONF_FLEET_DEVICES, "")),
+            exclude=(str(d.get(CONF_DEVICE_EUI, "")).strip(), int(d.get(CONF_CHANNEL_INDEX, 1) or 1)),
+        )
+        if devices:
+            fleet = FleetPoller(hass, entry.entry_id, controller, devices, int(d.get(CONF_POLL_SECONDS, 60)))
+            fleet.async_start()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
         "controller": controller,
         "coordinator": coordinator,
+        "fleet": fleet,
         "store": store,
         "entry": entry,
     }
 
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
+    async def _async_on_stop(_event: Event) -> None:
+        # flush buffered logs and pending state before HA goes down
+        if fleet is not None:
+            await fleet.async_stop()
+        await controller.async_shutdown()
+        await store.async_flush()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_on_stop))
+
     async def _svc_pump(call: ServiceCall) -> None:
         seconds = int(call.data.get("seconds", 0) or 0)
         ml = float(call.data.get("ml", 0.0) or 0.0)
@@ -137,27 +285,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             LOGGER.debug("Manual pump: plugHost empty")
             return
         plug_id = int(cfg.get(CONF_PLUG_ID, 0) or 0)
-        plug_user = str(cfg.get(CONF_PLUG_USER, "") or "")
-        plug_pass = str(cfg.get(CONF_PLUG_PASS, "") or "")
 
         ml_per_sec = float(cfg.get(CONF_ML_PER_SEC, 50.0) or 50.0)
+        dose_s = float(seconds)
         if seconds <= 0:
             if ml > 0:
-                import math
                 seconds = max(1, int(math.ceil(ml / max(0.1, ml_per_sec))))
+                dose_s = ml / max(0.1, ml_per_sec) if controller.device_auto_off else float(seconds)
             else:
                 seconds = int(cfg.get(CONF_PUMP_SECONDS, 5) or 5)
+                dose_s = float(seconds)
 
-        ok = await shelly_set_switch(session, host, plug_id, True, user=plug_user, password=plug_pass)
+        ok = await controller.async_pump_on(host, plug_id, dose_s)
         if ok:
-            LOGGER.debug("Manual pump: switched ON ok host=%s id=%s seconds=%s", host, plug_id, seconds)
-            await controller.schedule_off(host, plug_id, seconds)
-            controller._totals_dirty = True  # type: ignore[attr-defined]
+            LOGGER.debug("Manual pump: switched ON ok host=%s id=%s seconds=%s", host, plug_id, dose_s)
+            now_ms = int(dt_util.utcnow().timestamp() * 1000)
+            await controller.async_record_pump(
+                PumpEvent(ts_ms=now_ms, ml=dose_s * ml_per_sec, sec=int(math.ceil(dose_s)), phase=controller._active_phase(), mode="manual")
+            )
+            await controller._update_totals_if_dirty()
+            coordinator.async_update_listeners()
         else:
             LOGGER.debug("Manual pump: switch ON failed host=%s id=%s", host, plug_id)
 
     hass.services.async_register(DOMAIN, "pump", _svc_pump)
 
+    _async_register_sample_services(hass)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
@@ -173,4 +327,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            if data.get("fleet") is not None:
+                await data["fleet"].async_stop()
+            await data["controller"].async_shutdown()
+            await data["store"].async_flush()
+        if not hass.data[DOMAIN]:
+            for service in SAMPLE_SERVICES:
+                hass.services.async_remove(DOMAIN, service)
+            await async_close_fetch_cache(hass)
+            await async_close_shelly_session(hass)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await SenseCapStateStore(hass, entry.entry_id).async_remove()
+    await async_remove_entry_logs(hass, entry.entry_id)
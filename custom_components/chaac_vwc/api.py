@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
-from dataclasses import dataclass
+import random
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Optional
 
@@ -129,6 +132,77 @@ class FetchResult:
     value: Optional[float]
     ts_ms: int
     err: str = ""
+    # the cloud answered but holds no value for this measurement (not a timeout/transport error)
+    no_data: bool = False
+
+
+class SharedFetchCache:
+    """Short-TTL result cache plus single-flight for identical cloud requests.
+
+    Shared by every client in the process (see controller.async_get_fetch_cache), so entries that
+    watch the same device share one request: concurrent callers await the same task, later callers
+    within ttl_s get the cached result. Only successful results are cached. A request is
+    cancelled once every caller waiting on it has given up (deadline, cancel).
+    """
+
+    MAX_ENTRIES = 512
+
+    def __init__(self, ttl_s: float = 15.0) -> None:
+        self.ttl_s = float(ttl_s)
+        self._results: dict[tuple, tuple[float, Any]] = {}
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # in-flight task -> callers still awaiting it
+        self._waiters: dict[asyncio.Task, int] = {}
+
+    async def get(self, key: tuple, factory: Any, ok: Any) -> Any:
+        hit = self._results.get(key)
+        if hit is not None:
+            if time.monotonic() < hit[0]:
+                return hit[1]
+            del self._results[key]
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t, ok))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # shield: one caller hitting its deadline must not cancel the request for the others
+            return await asyncio.shield(task)
+        finally:
+            left = self._waiters.pop(task) - 1
+            if left > 0:
+                self._waiters[task] = left
+            elif not task.done():
+                # nobody is waiting any more: stop the request, and don't hand the dying task
+                # to a caller arriving before its done callback has run
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+                task.cancel()
+
+    async def async_close(self) -> None:
+        """Cancel the requests still in flight and drop cached results."""
+        tasks = list(self._inflight.values())
+        self._inflight.clear()
+        self._results.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _done(self, key: tuple, task: asyncio.Task, ok: Any) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if not ok(result):
+            return
+        now = time.monotonic()
+        if len(self._results) >= self.MAX_ENTRIES:
+            for k in [k for k, (exp, _r) in self._results.items() if exp <= now]:
+                del self._results[k]
+        self._results[key] = (now + self.ttl_s, result)
 
 
 @dataclass
@@ -137,48 +211,141 @@ class SenseCapCloudClient:
     station: str
     access_id: str
     access_key: str
+    # Remember which endpoint variant ("openapi" | "alt" | "v1") last worked per (station, device);
+    # non-openapi variants are re-probed against openapi every reprobe_seconds.
+    reprobe_seconds: int = 900
+    # > 0: if the preferred endpoint hasn't answered after this many seconds, race the other one.
+    hedge_delay_s: float = 0.0
+    # Circuit breaker: after breaker_threshold consecutive transport failures (no response / 5xx)
+    # requests fail fast until a backoff (base * 2^n, jittered, capped) has passed; then a single
+    # half-open probe decides between closing and a longer backoff.
+    breaker_threshold: int = 5
+    breaker_base_s: float = 30.0
+    breaker_max_s: float = 900.0
+    # Optional cross-entry cache / request coalescing for fetch_latest and fetch_latest_batch.
+    shared_cache: SharedFetchCache | None = None
+    _affinity: dict[tuple[str, str], tuple[str, float]] = field(default_factory=dict, repr=False)
+    _fails: int = field(default=0, repr=False)
+    _trips: int = field(default=0, repr=False)
+    _open_until: float = field(default=0.0, repr=False)
+    _probing: bool = field(default=False, repr=False)
+
+    def _endpoint_pref(self, device_eui: str) -> str:
+        hit = self._affinity.get((self.station, device_eui))
+        if hit is None or time.monotonic() >= hit[1]:
+            return "openapi"
+        return hit[0]
+
+    def _remember_endpoint(self, device_eui: str, variant: str) -> None:
+        key = (self.station, device_eui)
+        hit = self._affinity.get(key)
+        now = time.monotonic()
+        if hit is None or hit[0] != variant or now >= hit[1]:
+            self._affinity[key] = (variant, now + max(60, int(self.reprobe_seconds)))
+
+    def breaker_retry_in(self) -> float | None:
+        """Seconds until the next probe while the breaker is open, None while requests may go out."""
+        if self._trips == 0:
+            return None
+        wait = self._open_until - time.monotonic()
+        if wait > 0:
+            return wait
+        return 0.0 if self._probing else None
+
+    def _breaker_admit(self) -> bool:
+        if self._trips == 0:
+            return True
+        if self._probing or time.monotonic() < self._open_until:
+            return False
+        self._probing = True  # half-open: this request is the probe
+        return True
+
+    def _breaker_record(self, transport_ok: bool, probe: bool) -> None:
+        if transport_ok:
+            self._fails = 0
+            self._trips = 0
+            self._probing = False
+            return
+        self._fails += 1
+        if probe or (self._trips == 0 and self._fails >= self.breaker_threshold):
+            backoff = min(self.breaker_max_s, self.breaker_base_s * 2 ** self._trips)
+            self._open_until = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+            self._trips += 1
+            self._probing = False
 
     async def _get_json(self, url: str, timeout_s: int = 12) -> tuple[int, Any, str]:
+        if not self._breaker_admit():
+            return 0, None, "circuit open"
+        probe = self._trips > 0
         headers = {"Authorization": _basic_auth_header(self.access_id, self.access_key)}
         try:
             async with self.session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout_s)) as resp:
                 text = await resp.text()
+                self._breaker_record(resp.status < 500, probe)
                 try:
                     return resp.status, json.loads(text), text
                 except Exception:
                     return resp.status, None, text
+        except asyncio.CancelledError:
+            if probe:
+                self._probing = False  # hedged loser / deadline: let the next request probe
+            raise
         except Exception as e:
+            self._breaker_record(False, probe)
             return 0, None, str(e)
 
-    async def fetch_latest_openapi(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
-        if not device_eui:
-            return FetchResult(False, None, 0, "no eui")
-
+    async def _get_openapi(self, query: str, device_eui: str = "") -> tuple[int, Any, str, str]:
         base = _normalize_base(station_base(self.station))
-        url = (
-            f"{base}/openapi/view_latest_telemetry_data"
-            f"?device_eui={device_eui}&measurement_id={measurement_id}&channel_index={channel_index}"
-        )
-        http, doc, raw = await self._get_json(url)
+        paths = {"openapi": f"{base}/openapi/view_latest_telemetry_data", "alt": f"{base}/view_latest_telemetry_data"}
+        first = "alt" if self._endpoint_pref(device_eui) == "alt" else "openapi"
+        variant = first
+        http, doc, raw = await self._get_json(f"{paths[first]}?{query}")
 
         # Some deployments respond without /openapi prefix; try fallback on 400/404.
         if http in (400, 404):
-            alt = (
-                f"{base}/view_latest_telemetry_data"
-                f"?device_eui={device_eui}&measurement_id={measurement_id}&channel_index={channel_index}"
-            )
-            http2, doc2, raw2 = await self._get_json(alt)
+            other = "openapi" if first == "alt" else "alt"
+            http2, doc2, raw2 = await self._get_json(f"{paths[other]}?{query}")
             if http2:
-                http, doc, raw = http2, doc2, raw2
+                http, doc, raw, variant = http2, doc2, raw2, other
+        return http, doc, raw, variant
 
+    @staticmethod
+    def _openapi_error(http: int, doc: Any, raw: str) -> str:
         if http != 200 or not isinstance(doc, dict):
             snip = (raw or "").replace("\n", " ").replace("\r", " ").strip()[:140]
-            return FetchResult(False, None, 0, f"openapi http {http} {snip}".strip())
+            return f"openapi http {http} {snip}".strip()
 
         code = _as_int(doc.get("code", -1), -1)
         if code != 0:
             msg = str(doc.get("msg", "")).replace("\n", " ").replace("\r", " ").strip()[:140]
-            return FetchResult(False, None, 0, f"openapi code {code} msg={msg}".strip())
+            return f"openapi code {code} msg={msg}".strip()
+        return ""
+
+    @staticmethod
+    def _point_result(p0: Any) -> FetchResult:
+        if not isinstance(p0, dict):
+            return FetchResult(False, None, 0, "", no_data=True)
+        val = _to_float_if_numberish(p0.get("measurement_value"))
+        if val is None:
+            return FetchResult(False, None, 0, "", no_data=True)
+        ts_ms = _normalize_telemetry_time_to_ms(p0.get("time"))
+        return FetchResult(True, val, ts_ms, "")
+
+    async def fetch_latest_openapi(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
+        fr, _variant = await self._fetch_openapi(device_eui, channel_index, measurement_id)
+        return fr
+
+    async def _fetch_openapi(self, device_eui: str, channel_index: int, measurement_id: int) -> tuple[FetchResult, str]:
+        if not device_eui:
+            return FetchResult(False, None, 0, "no eui"), "openapi"
+
+        http, doc, raw, variant = await self._get_openapi(
+            f"device_eui={device_eui}&measurement_id={measurement_id}&channel_index={channel_index}",
+            device_eui,
+        )
+        err = self._openapi_error(http, doc, raw)
+        if err:
+            return FetchResult(False, None, 0, err), variant
 
         data = doc.get("data")
         data_obj = None
@@ -188,19 +355,110 @@ class SenseCapCloudClient:
             data_obj = data[0]
 
         if not isinstance(data_obj, dict):
-            return FetchResult(False, None, 0, "")
+            return FetchResult(False, None, 0, "", no_data=True), variant
 
         points = data_obj.get("points") or []
         if not points or not isinstance(points, list) or not isinstance(points[0], dict):
-            return FetchResult(False, None, 0, "")
+            return FetchResult(False, None, 0, "", no_data=True), variant
+
+        return self._point_result(points[0]), variant
+
+    def _cache_key(self, device_eui: str, channel_index: int, what: Any) -> tuple:
+        # access_id too: two accounts must not see each other's data through the cache
+        return (self.station, self.access_id, device_eui, int(channel_index), what)
+
+    async def fetch_latest_batch(self, device_eui: str, channel_index: int, measurement_ids: dict[str, int]) -> dict[str, FetchResult]:
+        """Latest value of every measurement of one channel in a single openapi request."""
+        if self.shared_cache is None:
+            return await self._fetch_latest_batch(device_eui, channel_index, measurement_ids)
+        return await self.shared_cache.get(
+            self._cache_key(device_eui, channel_index, ("batch", tuple(sorted(measurement_ids.items())))),
+            lambda: self._fetch_latest_batch(device_eui, channel_index, measurement_ids),
+            lambda res: any(fr.ok for fr in res.values()),
+        )
 
-        p0 = points[0]
-        val = _to_float_if_numberish(p0.get("measurement_value"))
-        if val is None:
-            return FetchResult(False, None, 0, "")
+    async def _fetch_latest_batch(self, device_eui: str, channel_index: int, measurement_ids: dict[str, int]) -> dict[str, FetchResult]:
+        if not device_eui:
+            return {k: FetchResult(False, None, 0, "no eui") for k in measurement_ids}
 
-        ts_ms = _normalize_telemetry_time_to_ms(p0.get("time"))
-        return FetchResult(True, val, ts_ms, "")
+        if self._endpoint_pref(device_eui) == "v1":
+            # batch only exists on openapi; don't burn requests while this device is pinned to v1
+            return {k: FetchResult(False, None, 0, "openapi skipped (v1 affinity)") for k in measurement_ids}
+
+        http, doc, raw, variant = await self._get_openapi(f"device_eui={device_eui}&channel_index={channel_index}", device_eui)
+        err = self._openapi_error(http, doc, raw)
+        if err:
+            # every key carries the error -> caller falls back to per-measurement fetch_latest
+            return {k: FetchResult(False, None, 0, err) for k in measurement_ids}
+
+        data = doc.get("data")
+        if isinstance(data, dict):
+            data = data.get("list") if isinstance(data.get("list"), list) else [data]
+        if not isinstance(data, list):
+            data = []
+
+        by_mid: dict[int, FetchResult] = {}
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            ch = _as_int(item.get("channel_index", channel_index), channel_index)
+            if ch != channel_index:
+                continue
+            points = item.get("points")
+            if not isinstance(points, list):
+                continue
+            for p in points:
+                if not isinstance(p, dict):
+                    continue
+                mid = _as_int(p.get("measurement_id", item.get("measurement_id")), -1)
+                if mid < 0:
+                    continue
+                fr = self._point_result(p)
+                prev = by_mid.get(mid)
+                if fr.ok and (prev is None or fr.ts_ms > prev.ts_ms):
+                    by_mid[mid] = fr
+
+        if not by_mid:
+            return {k: FetchResult(False, None, 0, "openapi batch: no points", no_data=True) for k in measurement_ids}
+        self._remember_endpoint(device_eui, variant)
+        return {k: by_mid.get(mid, FetchResult(False, None, 0, "", no_data=True)) for k, mid in measurement_ids.items()}
+
+    async def discover_measurements(self, device_eui: str, channel_index: int) -> set[int] | None:
+        """Measurement ids the device reports on this channel (None if the request failed).
+
+        Uses the latest-telemetry listing without measurement_id, which returns one entry per
+        measurement the device has uploaded.
+        """
+        if not device_eui:
+            return None
+        http, doc, raw, variant = await self._get_openapi(f"device_eui={device_eui}&channel_index={channel_index}", device_eui)
+        if self._openapi_error(http, doc, raw):
+            return None
+
+        data = doc.get("data")
+        if isinstance(data, dict):
+            data = data.get("list") if isinstance(data.get("list"), list) else [data]
+        if not isinstance(data, list):
+            return None
+
+        mids: set[int] = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            if _as_int(item.get("channel_index", channel_index), channel_index) != channel_index:
+                continue
+            mid = _as_int(item.get("measurement_id"), -1)
+            if mid >= 0:
+                mids.add(mid)
+            points = item.get("points")
+            if isinstance(points, list):
+                for p in points:
+                    if isinstance(p, dict):
+                        pm = _as_int(p.get("measurement_id"), -1)
+                        if pm >= 0:
+                            mids.add(pm)
+        self._remember_endpoint(device_eui, variant)
+        return mids
 
     async def fetch_latest_v1(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
         base = _normalize_base(station_base(self.station))
@@ -216,16 +474,16 @@ class SenseCapCloudClient:
 
         data = doc.get("data")
         if not isinstance(data, list) or not data or not isinstance(data[0], dict):
-            return FetchResult(False, None, 0, "No data")
+            return FetchResult(False, None, 0, "No data", no_data=True)
 
         points = data[0].get("points")
         if not isinstance(points, list) or not points or not isinstance(points[0], dict):
-            return FetchResult(False, None, 0, "No points")
+            return FetchResult(False, None, 0, "No points", no_data=True)
 
         p0 = points[0]
         val = _to_float_if_numberish(p0.get("value"))
         if val is None:
-            return FetchResult(False, None, 0, "None")
+            return FetchResult(False, None, 0, "None", no_data=True)
 
         created = p0.get("created")
         ts_ms = _parse_iso_to_ms_utc(created) if isinstance(created, str) else 0
@@ -235,11 +493,77 @@ class SenseCapCloudClient:
         return FetchResult(True, val, ts_ms, "")
 
     async def fetch_latest(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
-        r2 = await self.fetch_latest_openapi(device_eui, channel_index, measurement_id)
-        if r2.ok:
-            return r2
-        r1 = await self.fetch_latest_v1(device_eui, channel_index, measurement_id)
-        if r1.ok:
-            return r1
+        if self.shared_cache is None:
+            return await self._fetch_latest(device_eui, channel_index, measurement_id)
+        return await self.shared_cache.get(
+            self._cache_key(device_eui, channel_index, int(measurement_id)),
+            lambda: self._fetch_latest(device_eui, channel_index, measurement_id),
+            lambda fr: fr.ok,
+        )
+
+    async def _fetch_latest(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
+        if self.hedge_delay_s > 0:
+            return await self._fetch_latest_hedged(device_eui, channel_index, measurement_id)
+
+        if self._endpoint_pref(device_eui) == "v1":
+            r1 = await self.fetch_latest_v1(device_eui, channel_index, measurement_id)
+            if r1.ok:
+                return r1
+            r2, variant = await self._fetch_openapi(device_eui, channel_index, measurement_id)
+            if r2.ok:
+                self._remember_endpoint(device_eui, variant)
+                return r2
+        else:
+            r2, variant = await self._fetch_openapi(device_eui, channel_index, measurement_id)
+            if r2.ok:
+                self._remember_endpoint(device_eui, variant)
+                return r2
+            r1 = await self.fetch_latest_v1(device_eui, channel_index, measurement_id)
+            if r1.ok:
+                self._remember_endpoint(device_eui, "v1")
+                return r1
         err = r2.err or r1.err or "No data"
-        return FetchResult(False, None, 0, err)
+        # empty only if both endpoints answered without a value
+        return FetchResult(False, None, 0, err, no_data=r2.no_data and r1.no_data)
+
+    async def _fetch_latest_hedged(self, device_eui: str, channel_index: int, measurement_id: int) -> FetchResult:
+        async def _openapi() -> tuple[FetchResult, str]:
+            return await self._fetch_openapi(device_eui, channel_index, measurement_id)
+
+        async def _v1() -> tuple[FetchResult, str]:
+            return await self.fetch_latest_v1(device_eui, channel_index, measurement_id), "v1"
+
+        v1_first = self._endpoint_pref(device_eui) == "v1"
+        primary = asyncio.ensure_future(_v1() if v1_first else _openapi())
+        tasks = [primary]
+        errs: dict[str, str] = {}
+        empty: list[bool] = []
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay_s)
+            if done:
+                fr, variant = primary.result()
+                if fr.ok:
+                    self._remember_endpoint(device_eui, variant)
+                    return fr
+                errs["v1" if variant == "v1" else "openapi"] = fr.err
+                empty.append(fr.no_data)
+
+            # primary is slow (or failed fast): fire the secondary, first valid answer wins
+            tasks.append(asyncio.ensure_future(_openapi() if v1_first else _v1()))
+            pending = {t for t in tasks if not t.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    fr, variant = t.result()
+                    if fr.ok:
+                        self._remember_endpoint(device_eui, variant)
+                        return fr
+                    errs["v1" if variant == "v1" else "openapi"] = fr.err
+                    empty.append(fr.no_data)
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+        err = errs.get("openapi") or errs.get("v1") or "No data"
+        return FetchResult(False, None, 0, err, no_data=len(empty) == 2 and all(empty))
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from collections import deque
+
+# Adaptive polling: learn when a device uploads so the next poll lands just after the upload
+# shows up in the cloud. Intervals outside [MIN, MAX] are not uploads we can learn from.
+CADENCE_HISTORY = 8
+CADENCE_MIN_PERIOD_S = 30
+CADENCE_MAX_PERIOD_S = 4 * 3600
+CADENCE_GRACE_S = 20  # added to the learned cloud lag before the expected upload is polled
+CADENCE_MIN_DELAY_S = 10
+
+
+class UploadCadence:
+    """Learns a device's upload period (and cloud lag) from successive telemetry timestamps."""
+
+    def __init__(self) -> None:
+        self.last_ts_ms = 0
+        self._intervals: deque[int] = deque(maxlen=CADENCE_HISTORY)
+        # upload -> visible-in-cloud delay; None until the first upload was seen
+        self._lag_ms: int | None = None
+        self._due_ms = 0
+
+    def observe(self, ts_ms: int, now_ms: int) -> bool:
+        """Record the newest telemetry timestamp; True if it is a new upload."""
+        if ts_ms <= self.last_ts_ms:
+            if self._due_ms and now_ms >= self._due_ms and self._lag_ms is not None:
+                # polled at the expected time but the upload isn't visible yet: allow more lag
+                self._lag_ms += CADENCE_GRACE_S * 1000
+                self._due_ms = 0
+            return False
+        if self.last_ts_ms > 0:
+            iv = ts_ms - self.last_ts_ms
+            if CADENCE_MIN_PERIOD_S * 1000 <= iv <= CADENCE_MAX_PERIOD_S * 1000:
+                self._intervals.append(iv)
+        if now_ms >= ts_ms:
+            # each observation is only an upper bound of the lag (we may have polled late)
+            lag = now_ms - ts_ms
+            self._lag_ms = lag if self._lag_ms is None else min(self._lag_ms, lag)
+        self.last_ts_ms = ts_ms
+        self._due_ms = 0
+        return True
+
+    @property
+    def period_ms(self) -> int | None:
+        # median: a missed upload (2x interval) or a retransmit does not move the estimate
+        if len(self._intervals) < 2:
+            return None
+        return sorted(self._intervals)[len(self._intervals) // 2]
+
+    def next_poll_s(self, now_ms: int, base_s: float) -> float:
+        """Poll just after the next expected upload; probe at base_s until a late upload shows up."""
+        period = self.period_ms
+        if period is None or self.last_ts_ms <= 0:
+            return base_s
+        lag = min(self._lag_ms or 0, period // 2)
+        due_ms = self.last_ts_ms + period + lag + CADENCE_GRACE_S * 1000
+        if due_ms <= now_ms:
+            return base_s
+        self._due_ms = due_ms
+        return max(CADENCE_MIN_DELAY_S, (due_ms - now_ms) / 1000)
@@ -24,13 +24,23 @@ CONF_ACCESS_KEY     = "accessKey"
 CONF_DEVICE_EUI     = "deviceEui"
 CONF_POLL_SECONDS   = "pollSeconds"
 CONF_KEEP_DAYS      = "keepDays"
+CONF_SAMPLE_FORMAT  = "sampleFormat"
+CONF_ROLLUP_KEEP_DAYS = "rollupKeepDays"
+CONF_ROLLING_HOURS  = "rollingHours"
 CONF_CHANNEL_INDEX  = "channelIndex"
+CONF_FLEET_DEVICES  = "fleetDevices"
 
 CONF_PLUG_ENABLED   = "plugEnabled"
 CONF_PLUG_HOST      = "plugHost"
 CONF_PLUG_ID        = "plugId"
 CONF_PLUG_USER      = "plugUser"
 CONF_PLUG_PASS      = "plugPass"
+CONF_SHELLY_PREWARM = "shellyPrewarm"
+CONF_DEVICE_AUTO_OFF = "deviceAutoOff"
+
+CONF_PUMP_DB        = "pumpDb"
+CONF_PUMP_WINDOWS   = "pumpWindows"
+CONF_SEASON_START   = "seasonStart"
 
 CONF_THRESHOLD_P1   = "thresholdP1"
 CONF_THRESHOLD_P2   = "thresholdP2"
@@ -52,16 +62,33 @@ CONF_P2_START_M = "p2StartMinute"
 CONF_P2_END_H   = "p2EndHour"
 CONF_P2_END_M   = "p2EndMinute"
 
+CONF_CONCURRENT_FETCH      = "concurrentFetch"
+CONF_FETCH_CONCURRENCY     = "fetchConcurrency"
+CONF_POLL_DEADLINE_SECONDS = "pollDeadlineSeconds"
+CONF_BATCH_FETCH           = "batchFetch"
+CONF_HEDGE_DELAY_SECONDS   = "hedgeDelaySeconds"
+CONF_ADAPTIVE_POLL         = "adaptivePoll"
+CONF_WINDOW_POLLING        = "windowPolling"
+CONF_OFF_WINDOW_POLL_SECONDS = "offWindowPollSeconds"
+CONF_SLOW_METRIC_EVERY     = "slowMetricEvery"
+
 # Defaults (match const.py)
 DEFAULT_STATION = "global"
 DEFAULT_POLL_SECONDS = 60
 DEFAULT_KEEP_DAYS = 2
+DEFAULT_ROLLUP_KEEP_DAYS = 400
+DEFAULT_ROLLING_HOURS = 6
+DEFAULT_OFF_WINDOW_POLL_SECONDS = 900
 DEFAULT_CHANNEL_INDEX = 1
 DEFAULT_THRESHOLD = 35.0
 DEFAULT_ML_PER_SEC = 50.0
 DEFAULT_PUMP_ML = 200.0
 DEFAULT_PUMP_SECONDS = 5
 DEFAULT_PLANT_INTERVAL_MIN = 5
+DEFAULT_FETCH_CONCURRENCY = 3
+DEFAULT_POLL_DEADLINE_SECONDS = 30
+DEFAULT_PUMP_WINDOWS = "30,90,365,season"
+DEFAULT_SEASON_START = "03-01"
 
 
 def _clamp_int(v, lo, hi, d):
@@ -311,13 +338,35 @@ class ChaacVwcOptionsFlow(config_entries.OptionsFlow):
 
             vol.Optional(CONF_POLL_SECONDS, default=d.get(CONF_POLL_SECONDS, DEFAULT_POLL_SECONDS)): vol.Coerce(int),
             vol.Optional(CONF_KEEP_DAYS, default=d.get(CONF_KEEP_DAYS, DEFAULT_KEEP_DAYS)): vol.Coerce(int),
+            vol.Optional(CONF_SAMPLE_FORMAT, default=d.get(CONF_SAMPLE_FORMAT, "jsonl")): vol.In(
+                {"jsonl": "JSONL (hourly files)", "binary": "Binary (daily fixed-width segments)"}
+            ),
+            vol.Optional(CONF_ROLLUP_KEEP_DAYS, default=d.get(CONF_ROLLUP_KEEP_DAYS, DEFAULT_ROLLUP_KEEP_DAYS)): vol.Coerce(int),
+            vol.Optional(CONF_ROLLING_HOURS, default=d.get(CONF_ROLLING_HOURS, DEFAULT_ROLLING_HOURS)): vol.Coerce(int),
 
             vol.Optional(CONF_CHANNEL_INDEX, default=d.get(CONF_CHANNEL_INDEX, DEFAULT_CHANNEL_INDEX)): vol.Coerce(int),
+            vol.Optional(CONF_FLEET_DEVICES, default=d.get(CONF_FLEET_DEVICES, "")): str,
 
             vol.Optional(CONF_PLUG_ENABLED, default=d.get(CONF_PLUG_ENABLED, False)): bool,
             vol.Optional(CONF_PLUG_HOST, default=d.get(CONF_PLUG_HOST, "")): str,
             vol.Optional(CONF_PLUG_ID, default=d.get(CONF_PLUG_ID, 0)): vol.Coerce(int),
             vol.Optional(CONF_PLUG_USER, default=d.get(CONF_PLUG_USER, "")): str,
             vol.Optional(CONF_PLUG_PASS, default=d.get(CONF_PLUG_PASS, "")): str,
+            vol.Optional(CONF_SHELLY_PREWARM, default=d.get(CONF_SHELLY_PREWARM, True)): bool,
+            vol.Optional(CONF_DEVICE_AUTO_OFF, default=d.get(CONF_DEVICE_AUTO_OFF, False)): bool,
+
+            vol.Optional(CONF_PUMP_DB, default=d.get(CONF_PUMP_DB, False)): bool,
+            vol.Optional(CONF_PUMP_WINDOWS, default=d.get(CONF_PUMP_WINDOWS, DEFAULT_PUMP_WINDOWS)): str,
+            vol.Optional(CONF_SEASON_START, default=d.get(CONF_SEASON_START, DEFAULT_SEASON_START)): str,
+
+            vol.Optional(CONF_CONCURRENT_FETCH, default=d.get(CONF_CONCURRENT_FETCH, True)): bool,
+            vol.Optional(CONF_FETCH_CONCURRENCY, default=d.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY)): vol.Coerce(int),
+            vol.Optional(CONF_POLL_DEADLINE_SECONDS, default=d.get(CONF_POLL_DEADLINE_SECONDS, DEFAULT_POLL_DEADLINE_SECONDS)): vol.Coerce(int),
+            vol.Optional(CONF_BATCH_FETCH, default=d.get(CONF_BATCH_FETCH, True)): bool,
+            vol.Optional(CONF_HEDGE_DELAY_SECONDS, default=d.get(CONF_HEDGE_DELAY_SECONDS, 0.0)): vol.Coerce(float),
+            vol.Optional(CONF_ADAPTIVE_POLL, default=d.get(CONF_ADAPTIVE_POLL, False)): bool,
+            vol.Optional(CONF_WINDOW_POLLING, default=d.get(CONF_WINDOW_POLLING, False)): bool,
+            vol.Optional(CONF_OFF_WINDOW_POLL_SECONDS, default=d.get(CONF_OFF_WINDOW_POLL_SECONDS, DEFAULT_OFF_WINDOW_POLL_SECONDS)): vol.Coerce(int),
+            vol.Optional(CONF_SLOW_METRIC_EVERY, default=d.get(CONF_SLOW_METRIC_EVERY, 1)): vol.Coerce(int),
         })
         return self.async_show_form(step_id="init", data_schema=schema)
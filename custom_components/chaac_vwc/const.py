@@ -8,15 +8,25 @@ CONF_ACCESS_ID = "accessId"
 CONF_ACCESS_KEY = "accessKey"
 CONF_POLL_SECONDS = "pollSeconds"
 CONF_KEEP_DAYS = "keepDays"
+CONF_SAMPLE_FORMAT = "sampleFormat"  # "jsonl" | "binary"
+CONF_ROLLUP_KEEP_DAYS = "rollupKeepDays"  # hourly rollups; daily rollups are kept ~10 years
+CONF_ROLLING_HOURS = "rollingHours"       # in-memory window for rolling stats / moisture trend
 
 CONF_DEVICE_EUI = "deviceEui"
 CONF_CHANNEL_INDEX = "channelIndex"
+CONF_FLEET_DEVICES = "fleetDevices"      # extra devices: "EUI[:channel][=name], ..."
 
 CONF_PLUG_ENABLED = "plugEnabled"
 CONF_PLUG_HOST = "plugHost"
 CONF_PLUG_ID = "plugId"
 CONF_PLUG_USER = "plugUser"
 CONF_PLUG_PASS = "plugPass"
+CONF_SHELLY_PREWARM = "shellyPrewarm"
+CONF_DEVICE_AUTO_OFF = "deviceAutoOff"      # plug turns itself off (toggle_after / timer)
+
+CONF_PUMP_DB = "pumpDb"                     # SQLite pump history for long windows
+CONF_PUMP_WINDOWS = "pumpWindows"           # e.g. "30,90,365,season"
+CONF_SEASON_START = "seasonStart"           # "MM-DD"
 
 CONF_SENSOR_SOURCE = "sensorSource"
 CONF_MOIST_ENTITY = "moistEntity"
@@ -43,10 +53,23 @@ CONF_P2_START_M = "p2StartMinute"
 CONF_P2_END_H = "p2EndHour"
 CONF_P2_END_M = "p2EndMinute"
 
+CONF_CONCURRENT_FETCH = "concurrentFetch"
+CONF_FETCH_CONCURRENCY = "fetchConcurrency"
+CONF_POLL_DEADLINE_SECONDS = "pollDeadlineSeconds"
+CONF_BATCH_FETCH = "batchFetch"
+CONF_HEDGE_DELAY_SECONDS = "hedgeDelaySeconds"   # 0 = no hedging
+CONF_ADAPTIVE_POLL = "adaptivePoll"              # poll after the learned device upload period
+CONF_WINDOW_POLLING = "windowPolling"            # slow/no polling outside P1/P2
+CONF_OFF_WINDOW_POLL_SECONDS = "offWindowPollSeconds"  # 0 = no polling outside P1/P2
+CONF_SLOW_METRIC_EVERY = "slowMetricEvery"      # temp/EC/epsilon every Nth poll (per-measurement fetch)
+
 DEFAULT_ENABLED = True
 DEFAULT_STATION = "global"
 DEFAULT_POLL_SECONDS = 60
 DEFAULT_KEEP_DAYS = 2
+DEFAULT_ROLLUP_KEEP_DAYS = 400
+DEFAULT_ROLLING_HOURS = 6
+DEFAULT_OFF_WINDOW_POLL_SECONDS = 900
 
 DEFAULT_CHANNEL_INDEX = 1
 DEFAULT_THRESHOLD = 35.0
@@ -54,6 +77,10 @@ DEFAULT_ML_PER_SEC = 50.0
 DEFAULT_PUMP_ML = 200.0
 DEFAULT_PUMP_SECONDS = 5
 DEFAULT_PLANT_INTERVAL_MIN = 5
+DEFAULT_FETCH_CONCURRENCY = 3
+DEFAULT_POLL_DEADLINE_SECONDS = 30
+DEFAULT_PUMP_WINDOWS = "30,90,365,season"
+DEFAULT_SEASON_START = "03-01"
 
 # SenseCAP measurement IDs (match SenseCapESP.h)
 MEASUREMENT_IDS = {
@@ -84,8 +111,12 @@ def default_cfg() -> dict:
         CONF_TEMP_ENTITY: "",
         CONF_EC_ENTITY: "",
         CONF_KEEP_DAYS: DEFAULT_KEEP_DAYS,
+        CONF_SAMPLE_FORMAT: "jsonl",
+        CONF_ROLLUP_KEEP_DAYS: DEFAULT_ROLLUP_KEEP_DAYS,
+        CONF_ROLLING_HOURS: DEFAULT_ROLLING_HOURS,
 
         CONF_DEVICE_EUI: "",
+        CONF_FLEET_DEVICES: "",
         CONF_CHANNEL_INDEX: DEFAULT_CHANNEL_INDEX,
 
         CONF_PLUG_ENABLED: False,
@@ -93,6 +124,12 @@ def default_cfg() -> dict:
         CONF_PLUG_ID: 0,
         CONF_PLUG_USER: "",
         CONF_PLUG_PASS: "",
+        CONF_SHELLY_PREWARM: True,
+        CONF_DEVICE_AUTO_OFF: False,
+
+        CONF_PUMP_DB: False,
+        CONF_PUMP_WINDOWS: DEFAULT_PUMP_WINDOWS,
+        CONF_SEASON_START: DEFAULT_SEASON_START,
 
         CONF_THRESHOLD_P1: DEFAULT_THRESHOLD,
         CONF_THRESHOLD_P2: DEFAULT_THRESHOLD,
@@ -109,4 +146,14 @@ def default_cfg() -> dict:
         CONF_P1_END_H: 0,   CONF_P1_END_M: 0,
         CONF_P2_START_H: 0, CONF_P2_START_M: 0,
         CONF_P2_END_H: 0,   CONF_P2_END_M: 0,
+
+        CONF_CONCURRENT_FETCH: True,
+        CONF_FETCH_CONCURRENCY: DEFAULT_FETCH_CONCURRENCY,
+        CONF_POLL_DEADLINE_SECONDS: DEFAULT_POLL_DEADLINE_SECONDS,
+        CONF_BATCH_FETCH: True,
+        CONF_HEDGE_DELAY_SECONDS: 0.0,
+        CONF_ADAPTIVE_POLL: False,
+        CONF_WINDOW_POLLING: False,
+        CONF_OFF_WINDOW_POLL_SECONDS: DEFAULT_OFF_WINDOW_POLL_SECONDS,
+        CONF_SLOW_METRIC_EVERY: 1,
     }
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import calendar
 import json
 import logging
 import hashlib
@@ -7,9 +9,11 @@ import os
 import re
 import math
 import os
+import shutil
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Any
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 import aiohttp
 from yarl import URL
@@ -69,54 +73,145 @@ def _ssl_kw(url: str):
     # Shelly https is often self-signed; behave like ESP (insecure).
     return False if (url or "").startswith("https://") else None
 
-async def _request_shelly(session: aiohttp.ClientSession, method: str, url: str, *, json_body=None, username: str = "", password: str = "", timeout_s: int = 5) -> tuple[int, str]:
-    # 1) try without auth
-    try:
-        async with session.request(method, url, json=json_body, timeout=aiohttp.ClientTimeout(total=timeout_s), ssl=_ssl_kw(url)) as resp:
-            txt = await resp.text()
-            if resp.status != 401 or not username or not password:
-                return resp.status, txt
-            www = resp.headers.get("WWW-Authenticate", "")
-    except Exception as e:
-        return 0, str(e)
+async def _request_shelly(session: aiohttp.ClientSession, method: str, url: str, *, json_body=None, username: str = "", password: str = "", timeout_s: int = 5, auth: str = "auto") -> tuple[int, str]:
+    st, txt, _used = await _request_shelly_auth(session, method, url, json_body=json_body, username=username, password=password, timeout_s=timeout_s, auth=auth)
+    return st, txt
 
-    # 2) digest retry
-    chal = _parse_digest_challenge(www)
-    if not chal.get("nonce"):
-        return 401, txt
 
-    nc = 1
-    cnonce = _hash_hex("MD5", os.urandom(16))
-    auth = _digest_authorization(
+@dataclass
+class _DigestState:
+    challenge: dict[str, str]
+    cnonce: str
+    nc: int = 0
+
+
+# Last digest challenge per origin (scheme://host:port); lets us authorize preemptively with nc+1.
+_DIGEST_STATES: dict[str, _DigestState] = {}
+
+
+def _digest_origin(url: str) -> str:
+    return str(URL(url).origin())
+
+
+async def _send_digest(session: aiohttp.ClientSession, method: str, url: str, *, json_body, username: str, password: str, state: _DigestState, timeout: aiohttp.ClientTimeout) -> tuple[int, str, str]:
+    state.nc += 1
+    auth_hdr = _digest_authorization(
         username=username,
         password=password,
         method=method.upper(),
         url=url,
-        challenge=chal,
-        nc=nc,
-        cnonce=cnonce,
+        challenge=state.challenge,
+        nc=state.nc,
+        cnonce=state.cnonce,
     )
+    async with session.request(
+        method,
+        url,
+        json=json_body,
+        headers={"Authorization": auth_hdr},
+        timeout=timeout,
+        ssl=_ssl_kw(url),
+    ) as resp:
+        return resp.status, await resp.text(), resp.headers.get("WWW-Authenticate", "")
+
+
+def _new_digest_state(www: str) -> _DigestState | None:
+    chal = _parse_digest_challenge(www)
+    if not chal.get("nonce"):
+        return None
+    return _DigestState(challenge=chal, cnonce=_hash_hex("MD5", os.urandom(16)))
+
+
+async def _request_shelly_auth(session: aiohttp.ClientSession, method: str, url: str, *, json_body=None, username: str = "", password: str = "", timeout_s: int = 5, auth: str = "auto") -> tuple[int, str, str]:
+    """Returns (status, body, auth scheme that was used: none|basic|digest)."""
+    timeout = aiohttp.ClientTimeout(total=timeout_s)
+
+    # Gen1 uses HTTP Basic: send it up front when we already know.
+    if auth == "basic" and username and password:
+        try:
+            async with session.request(method, url, json=json_body, auth=aiohttp.BasicAuth(username, password), timeout=timeout, ssl=_ssl_kw(url)) as resp:
+                return resp.status, await resp.text(), "basic"
+        except Exception as e:
+            return 0, str(e), "basic"
+
+    # Known digest session: authorize preemptively, re-challenge only if the nonce was rejected.
+    origin = _digest_origin(url)
+    state = _DIGEST_STATES.get(origin)
+    if state is not None and username and password and auth in ("auto", "digest"):
+        try:
+            st, txt, www = await _send_digest(session, method, url, json_body=json_body, username=username, password=password, state=state, timeout=timeout)
+        except Exception as e:
+            return 0, str(e), "digest"
+        if st != 401:
+            return st, txt, "digest"
+        _DIGEST_STATES.pop(origin, None)
+        fresh = _new_digest_state(www)
+        if fresh is None:
+            return st, txt, "digest"
+        _DIGEST_STATES[origin] = fresh
+        try:
+            st, txt, _www = await _send_digest(session, method, url, json_body=json_body, username=username, password=password, state=fresh, timeout=timeout)
+            if st == 401:
+                # wrong credentials, not a stale nonce: don't authorize preemptively next time
+                _DIGEST_STATES.pop(origin, None)
+            return st, txt, "digest"
+        except Exception as e:
+            return 0, str(e), "digest"
+
+    # 1) try without auth
+    try:
+        async with session.request(method, url, json=json_body, timeout=timeout, ssl=_ssl_kw(url)) as resp:
+            txt = await resp.text()
+            if resp.status != 401 or not username or not password or auth == "none":
+                return resp.status, txt, "none"
+            www = resp.headers.get("WWW-Authenticate", "")
+    except Exception as e:
+        return 0, str(e), "none"
+
+    # 2a) Gen1 answers 401 with a Basic challenge
+    if www.strip().lower().startswith("basic"):
+        try:
+            async with session.request(method, url, json=json_body, auth=aiohttp.BasicAuth(username, password), timeout=timeout, ssl=_ssl_kw(url)) as resp:
+                return resp.status, await resp.text(), "basic"
+        except Exception as e:
+            return 0, str(e), "basic"
+
+    # 2b) digest retry
+    state = _new_digest_state(www)
+    if state is None:
+        return 401, txt, "none"
+    _DIGEST_STATES[origin] = state
 
     try:
-        async with session.request(
-            method,
-            url,
-            json=json_body,
-            headers={"Authorization": auth},
-            timeout=aiohttp.ClientTimeout(total=timeout_s),
-        ) as resp2:
-            txt2 = await resp2.text()
-            return resp2.status, txt2
+        st, txt2, _www = await _send_digest(session, method, url, json_body=json_body, username=username, password=password, state=state, timeout=timeout)
+        if st == 401:
+            _DIGEST_STATES.pop(origin, None)
+        return st, txt2, "digest"
     except Exception as e:
-        return 0, str(e)
+        return 0, str(e), "digest"
 
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_call_later
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_change, async_track_time_interval
 from homeassistant.util import dt as dt_util
 
-from .api import SenseCapCloudClient
-from .const import MEASUREMENT_IDS
+from .api import FetchResult, SenseCapCloudClient, SharedFetchCache
+from .cadence import UploadCadence
+from . import samplefile
+from .pump_db import PumpEventStore
+from .recent import RecentSamples
+from .const import DOMAIN, MEASUREMENT_IDS
+
+DATA_SHELLY_SESSION = f"{DOMAIN}_shelly_session"
+DATA_SHELLY_SESSION_UNSUB = f"{DOMAIN}_shelly_session_unsub"
+DATA_FETCH_CACHE = f"{DOMAIN}_fetch_cache"
+DATA_LOG_MIGRATE_LOCK = f"{DOMAIN}_log_migrate_lock"
+FETCH_CACHE_TTL_S = 15
+
+# Keep the Shelly connection warm across a poll interval; pre-warm this many seconds before P1/P2.
+SHELLY_KEEPALIVE_S = 120
+SHELLY_PREWARM_LEAD_S = 15
 
 
 def _is_time_in_window_minutes(start_min: int, end_min: int, now_min: int) -> bool:
@@ -130,14 +225,6 @@ def _is_time_in_window_minutes(start_min: int, end_min: int, now_min: int) -> bo
     return now_min >= start_min or now_min < end_min  # wrap
 
 
-async def _http_get_ok(session: aiohttp.ClientSession, url: str, timeout_s: int = 3) -> bool:
-    try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout_s)) as resp:
-            return 200 <= resp.status < 300
-    except Exception:
-        return False
-
-
 def _normalize_host_url(host: str) -> str:
     h = (host or "").strip()
     if not h:
@@ -150,90 +237,178 @@ def _normalize_host_url(host: str) -> str:
     return ("http://" + h).rstrip("/")
 
 
-async def shelly_set_switch(session: aiohttp.ClientSession, host: str, plug_id: int, on: bool, user: str = "", password: str = "") -> bool:
+@dataclass
+class _ShellyProfile:
+    gen: int      # 1 = legacy /relay, 2 = RPC (Gen2/Gen3/Gen4)
+    method: str   # "rpc_get" | "rpc_post" | "relay"
+    auth: str     # "none" | "basic" | "digest"
+
+
+# Discovered per normalized host URL; dropped again as soon as a switch request fails.
+_SHELLY_PROFILES: dict[str, _ShellyProfile] = {}
+
+
+def _switch_request(base: str, method: str, plug_id: int, on: bool, toggle_after: float | None = None) -> tuple[str, str, Any]:
+    # toggle_after: the plug flips itself back after that many seconds (Gen2 toggle_after, Gen1 timer)
+    if method == "rpc_post":
+        body: dict[str, Any] = {"id": plug_id, "on": bool(on)}
+        if toggle_after:
+            body["toggle_after"] = round(float(toggle_after), 1)
+        return "POST", f"{base}/rpc/Switch.Set", body
+    if method == "relay":
+        timer = f"&timer={max(1, int(round(float(toggle_after))))}" if toggle_after else ""
+        return "GET", f"{base}/relay/{plug_id}?turn={'on' if on else 'off'}{timer}", None
+    toggle = f"&toggle_after={round(float(toggle_after), 1):g}" if toggle_after else ""
+    return "GET", f"{base}/rpc/Switch.Set?id={plug_id}&on={'true' if on else 'false'}{toggle}", None
+
+
+async def _probe_shelly(session: aiohttp.ClientSession, base: str) -> _ShellyProfile | None:
+    # /shelly is unauthenticated on every generation and tells us gen + whether auth is on.
+    st, body = await _request_shelly(session, "GET", f"{base}/shelly", timeout_s=3, auth="none")
+    if not (200 <= st < 300):
+        return None
+    try:
+        doc = json.loads(body)
+    except Exception:
+        return None
+    if not isinstance(doc, dict):
+        return None
+    if int(doc.get("gen", 0) or 0) >= 2:
+        return _ShellyProfile(gen=2, method="rpc_get", auth="digest" if doc.get("auth_en") else "none")
+    if "type" in doc:
+        return _ShellyProfile(gen=1, method="relay", auth="basic" if doc.get("auth") else "none")
+    return None
+
+
+async def shelly_set_switch(session: aiohttp.ClientSession, host: str, plug_id: int, on: bool, user: str = "", password: str = "", toggle_after: float | None = None) -> bool:
     base = _normalize_host_url(host)
     if not base:
         return False
 
     plug_id_i = int(plug_id)
-
-    # 1) EXACTLY like your ESP SenseCap controller: Gen2/Gen3 RPC via HTTP GET
-    url_get = f"{base}/rpc/Switch.Set?id={plug_id_i}&on={'true' if on else 'false'}"
-    st, body = await _request_shelly(session, "GET", url_get, username=(user or ""), password=(password or ""), timeout_s=5)
-    if 200 <= st < 300:
-        return True
-    if st:
-        LOGGER.debug("Shelly RPC GET failed: %s status=%s body=%s", url_get, st, (body or "").replace("\n", " ")[:160])
-
-    # 2) Additional: RPC POST JSON (some firmwares prefer it)
-    url_post = f"{base}/rpc/Switch.Set"
-    st, body = await _request_shelly(
-        session,
-        "POST",
-        url_post,
-        json_body={"id": plug_id_i, "on": bool(on)},
-        username=(user or ""),
-        password=(password or ""),
-        timeout_s=5,
-    )
-    if 200 <= st < 300:
-        return True
-    if st:
-        LOGGER.debug("Shelly RPC POST failed: %s status=%s body=%s", url_post, st, (body or "").replace("\n", " ")[:160])
-
-    # 3) Gen1 legacy fallback
-    url1 = f"{base}/relay/{plug_id_i}?turn={'on' if on else 'off'}"
-    st, body = await _request_shelly(session, "GET", url1, username=(user or ""), password=(password or ""), timeout_s=5)
-    if 200 <= st < 300:
-        return True
-    if st:
-        LOGGER.debug("Shelly Gen1 GET failed: %s status=%s body=%s", url1, st, (body or "").replace("\n", " ")[:160])
+    user = user or ""
+    password = password or ""
+
+    profile = _SHELLY_PROFILES.get(base)
+    if profile is None:
+        profile = await _probe_shelly(session, base)
+        if profile is not None:
+            LOGGER.debug("Shelly probe host=%s gen=%s auth=%s", base, profile.gen, profile.auth)
+            _SHELLY_PROFILES[base] = profile
+
+    if profile is not None:
+        http_method, url, json_body = _switch_request(base, profile.method, plug_id_i, on, toggle_after)
+        st, body, _used = await _request_shelly_auth(session, http_method, url, json_body=json_body, username=user, password=password, timeout_s=5, auth=profile.auth)
+        if 200 <= st < 300:
+            return True
+        _SHELLY_PROFILES.pop(base, None)
+        if not st:
+            LOGGER.debug("Shelly switch failed host=%s id=%s on=%s err=%s", base, plug_id_i, on, body)
+            return False
+        LOGGER.debug("Shelly cached %s failed: %s status=%s body=%s", profile.method, url, st, (body or "").replace("\n", " ")[:160])
+
+    # Full cascade: 1) RPC GET exactly like the ESP SenseCap controller, 2) RPC POST JSON
+    # (some firmwares prefer it), 3) Gen1 legacy /relay. Whatever works is cached.
+    for method in ("rpc_get", "rpc_post", "relay"):
+        http_method, url, json_body = _switch_request(base, method, plug_id_i, on, toggle_after)
+        st, body, used = await _request_shelly_auth(session, http_method, url, json_body=json_body, username=user, password=password, timeout_s=5)
+        if 200 <= st < 300:
+            _SHELLY_PROFILES[base] = _ShellyProfile(gen=1 if method == "relay" else 2, method=method, auth=used)
+            return True
+        if st:
+            LOGGER.debug("Shelly %s failed: %s status=%s body=%s", method, url, st, (body or "").replace("\n", " ")[:160])
 
     LOGGER.debug("Shelly switch failed host=%s id=%s on=%s", base, plug_id_i, on)
     return False
 
-    plug_id_i = int(plug_id)
 
-    # Gen2 RPC (FIRST) — prefer POST JSON (works reliably on Gen2)
-    url2 = f"{base}/rpc/Switch.Set"
+async def shelly_get_switch(session: aiohttp.ClientSession, host: str, plug_id: int, user: str = "", password: str = "") -> bool | None:
+    """Current relay output, or None if the plug could not be asked."""
+    base = _normalize_host_url(host)
+    if not base:
+        return None
+    profile = _SHELLY_PROFILES.get(base) or await _probe_shelly(session, base)
+    if profile is None:
+        return None
+    if profile.gen >= 2:
+        url, key = f"{base}/rpc/Switch.GetStatus?id={int(plug_id)}", "output"
+    else:
+        url, key = f"{base}/relay/{int(plug_id)}", "ison"
+    st, body, _used = await _request_shelly_auth(session, "GET", url, username=user or "", password=password or "", timeout_s=5, auth=profile.auth)
+    if not (200 <= st < 300):
+        return None
     try:
-        async with session.post(
-            url2,
-            json={"id": plug_id_i, "on": bool(on)},
-            timeout=aiohttp.ClientTimeout(total=4),
-        ) as resp:
-            if 200 <= resp.status < 300:
-                return True
-            body = (await resp.text()).replace("\n", " ").replace("\r", " ")[:160]
-            LOGGER.debug("Shelly Gen2 POST failed: %s status=%s body=%s", url2, resp.status, body)
-    except Exception as e:
-        LOGGER.debug("Shelly Gen2 POST error: %s err=%s", url2, e)
+        doc = json.loads(body)
+    except Exception:
+        return None
+    if not isinstance(doc, dict) or key not in doc:
+        return None
+    return bool(doc.get(key))
 
-    # Gen2 RPC fallback via querystring GET (some firmwares accept it)
-    url2g = f"{base}/rpc/Switch.Set?id={plug_id_i}&on={'true' if on else 'false'}"
-    if await _http_get_ok(session, url2g):
-        return True
 
-    # Gen1 legacy fallback
-    url1 = f"{base}/relay/{plug_id_i}?turn={'on' if on else 'off'}"
-    if await _http_get_ok(session, url1):
-        return True
-
-    LOGGER.debug("Shelly switch failed (Gen2+Gen1) host=%s id=%s on=%s", base, plug_id_i, on)
-    return False
+async def shelly_prewarm(session: aiohttp.ClientSession, host: str) -> bool:
+    """Open (and keep alive) the connection to the plug; refreshes the cached profile on the way."""
+    base = _normalize_host_url(host)
+    if not base:
+        return False
+    profile = await _probe_shelly(session, base)
+    if profile is None:
+        return False
+    _SHELLY_PROFILES[base] = profile
+    return True
+
+
+@callback
+def async_get_fetch_cache(hass: HomeAssistant) -> SharedFetchCache:
+    """Integration-wide SenseCAP result cache: entries polling the same device share requests."""
+    cache = hass.data.get(DATA_FETCH_CACHE)
+    if cache is None:
+        cache = hass.data[DATA_FETCH_CACHE] = SharedFetchCache(FETCH_CACHE_TTL_S)
+    return cache
+
+
+async def async_close_fetch_cache(hass: HomeAssistant) -> None:
+    cache = hass.data.pop(DATA_FETCH_CACHE, None)
+    if cache is not None:
+        await cache.async_close()
+
+
+@callback
+def async_get_shelly_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Integration-wide session for Shelly plugs: keep-alive, few sockets per host, cached DNS."""
+    session = hass.data.get(DATA_SHELLY_SESSION)
+    if session is not None and not session.closed:
+        return session
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=2,
+        keepalive_timeout=SHELLY_KEEPALIVE_S,
+        ttl_dns_cache=300,
+        ssl=False,
+        enable_cleanup_closed=True,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    hass.data[DATA_SHELLY_SESSION] = session
 
+    async def _close(_event: Event) -> None:
+        hass.data.pop(DATA_SHELLY_SESSION_UNSUB, None)
+        await session.close()
 
-    # Gen2 RPC (first) – like SenseCapESP.cpp
-    url2 = f"{base}/rpc/Switch.Set?id={int(plug_id)}&on={'true' if on else 'false'}"
-    if await _http_get_ok(session, url2):
-        return True
+    # one listener per session: a session recreated after the last unload replaces the old one
+    unsub = hass.data.pop(DATA_SHELLY_SESSION_UNSUB, None)
+    if unsub is not None:
+        unsub()
+    hass.data[DATA_SHELLY_SESSION_UNSUB] = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _close)
+    return session
 
-    # Gen1 legacy fallback
-    url1 = f"{base}/relay/{int(plug_id)}?turn={'on' if on else 'off'}"
-    if await _http_get_ok(session, url1):
-        return True
 
-    return False
+async def async_close_shelly_session(hass: HomeAssistant) -> None:
+    unsub = hass.data.pop(DATA_SHELLY_SESSION_UNSUB, None)
+    if unsub is not None:
+        unsub()
+    session = hass.data.pop(DATA_SHELLY_SESSION, None)
+    if session is not None and not session.closed:
+        await session.close()
 
 
 @dataclass
@@ -241,122 +416,661 @@ class PumpEvent:
     ts_ms: int
     ml: float
     sec: int
-    phase: str  # "P1"|"P2"
+    phase: str  # "P1"|"P2" ("" for manual outside the windows)
     mode: str   # "auto"|"manual"
 
 
+# Buffered log writes: flush after this many seconds or this many queued lines, whichever comes first.
+LOG_FLUSH_SECONDS = 10
+LOG_FLUSH_LINES = 64
+RETENTION_SWEEP_INTERVAL = timedelta(hours=1)
+# logs live under LOG_ROOT/<entry_id>/; LEGACY_LOG_ITEMS directly under LOG_ROOT were shared by
+# all entries and are moved into the first entry that loads
+LOG_ROOT = ("chaac_vwc_logs",)
+LEGACY_LOG_ITEMS = ("samples", "rollups", "pumps", "pumps.db", "pumps.db-wal", "pumps.db-shm")
+PUMP_DAY_COUNTERS_KEEP = 7  # longest pump total window (7d)
+ROLLUP_METRICS = ("temp", "moist", "ec", "wec", "eps")
+ROLLUP_DAILY_KEEP_DAYS = 3650
+# per-measurement fetch: these every poll, the rest every slowMetricEvery-th poll
+FAST_MEASUREMENTS = ("soilMoist",)
+SAMPLE_KEYS = {"temp": "soilTemp", "moist": "soilMoist", "ec": "soilEc", "wec": "waterEc", "eps": "epsilon"}
+# capability discovery (persisted per device channel) and negative caching of empty measurements
+CAPABILITY_REFRESH_S = 30 * 86400
+CAPABILITY_RETRY_S = 3600
+NO_DATA_AFTER_FAILS = 3
+NO_DATA_RECHECK_BASE_S = 600
+NO_DATA_RECHECK_MAX_S = 86400
+
+
+class _BufferedWriter:
+    """Append queue for one log directory; written in batches by a single executor job.
+
+    With index_every > 0 every Nth record (and the first after opening a segment) also gets
+    a "t,offset" line in the segment's sidecar .idx file, so range reads can seek.
+    on_open(f), if given, runs on every segment opened for append (before the header check).
+    """
+
+    def __init__(self, hass: HomeAssistant, base_dir: str, index_every: int = 0, on_open: Any = None) -> None:
+        self.hass = hass
+        self.base_dir = base_dir
+        self.index_every = int(index_every)
+        self.on_open = on_open
+        self._queue: list[tuple[str, bytes, bytes, int | None]] = []
+        # only touched inside executor jobs: path -> open file / open .idx file / records since open
+        self._handles: dict[str, Any] = {}
+        self._idx_handles: dict[str, Any] = {}
+        self._counts: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._unsub_timer: Any = None
+        self._dirs_ok = False
+
+    @callback
+    def append(self, path: str, data: bytes, header: bytes = b"", t: int | None = None) -> None:
+        # header is written first if the segment file is new/empty; t feeds the sparse index
+        self._queue.append((path, data, header, t))
+        if len(self._queue) >= LOG_FLUSH_LINES:
+            self.hass.async_create_task(self.async_flush())
+        elif self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, LOG_FLUSH_SECONDS, self._async_flush_timer)
+
+    async def _async_flush_timer(self, _now) -> None:
+        self._unsub_timer = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        async with self._lock:
+            if not self._queue:
+                return
+            batch, self._queue = self._queue, []
+            await self.hass.async_add_executor_job(self._write_batch, batch)
+
+    async def async_close(self) -> None:
+        await self.async_flush()
+        async with self._lock:
+            if self._handles:
+                await self.hass.async_add_executor_job(self._close_handles)
+
+    def _write_batch(self, batch: list[tuple[str, bytes, bytes, int | None]]) -> None:
+        if not self._dirs_ok:
+            os.makedirs(self.base_dir, exist_ok=True)
+            self._dirs_ok = True
+        for path, data, header, t in batch:
+            f = self._handles.get(path)
+            if f is None:
+                # a new segment started: older segments won't be appended to again
+                self._close_handles()
+                try:
+                    f = open(path, "ab")
+                    if self.on_open is not None:
+                        self.on_open(f)
+                    if header and f.tell() == 0:
+                        f.write(header)
+                    if self.index_every > 0:
+                        self._idx_handles[path] = open(path + ".idx", "a", encoding="ascii")
+                except Exception as e:
+                    LOGGER.debug("Log open failed %s: %s", path, e)
+                    continue
+                self._handles[path] = f
+                self._counts[path] = 0
+            try:
+                idx = self._idx_handles.get(path)
+                if idx is not None and t is not None and self._counts[path] % self.index_every == 0:
+                    idx.write(f"{int(t)},{f.tell()}\n")
+                f.write(data)
+                self._counts[path] += 1
+            except Exception as e:
+                LOGGER.debug("Log write failed %s: %s", path, e)
+        for f in list(self._handles.values()) + list(self._idx_handles.values()):
+            try:
+                f.flush()
+            except Exception:
+                pass
+
+    def _close_handles(self) -> None:
+        for f in list(self._handles.values()) + list(self._idx_handles.values()):
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._handles.clear()
+        self._idx_handles.clear()
+        self._counts.clear()
+
+
 class _JsonlFiles:
+    # segment file names are f"{start.strftime(STEM_FORMAT)}{SUFFIX}", each covering SEGMENT_SPAN
+    SUFFIX = ""
+    STEM_FORMAT = ""
+    SEGMENT_SPAN = timedelta(days=1)
+    INDEX_EVERY = 0
+    TIME_KEY = "t"
+    # other formats that may sit in the same directory (sampleFormat was switched): (SUFFIX,
+    # STEM_FORMAT, SEGMENT_SPAN); never read or appended to, only expired by retention
+    FOREIGN_SEGMENTS: tuple[tuple[str, str, timedelta], ...] = ()
+
     def __init__(self, hass: HomeAssistant, base_dir_parts: list[str], keep_days: int) -> None:
         self.hass = hass
         self.keep_days = max(2, min(7, int(keep_days)))
         self.base_dir = hass.config.path(*base_dir_parts)
+        self.writer = _BufferedWriter(hass, self.base_dir, index_every=self.INDEX_EVERY, on_open=self._on_segment_open)
+        # retention index: segment path -> segment start (naive local); built by the first sweep
+        self._segments: dict[str, datetime] | None = None
+        # FOREIGN_SEGMENTS files found by the first sweep: path -> segment end (naive local)
+        self._foreign: dict[str, datetime] = {}
+
+    def _file_for(self, dt_local: datetime) -> str:
+        return os.path.join(self.base_dir, f"{dt_local.strftime(self.STEM_FORMAT)}{self.SUFFIX}")
+
+    def _on_segment_open(self, f) -> None:
+        """Executor: a segment file was opened for append."""
+
+    def _parse_name(self, name: str, suffix: str | None = None, stem_format: str | None = None) -> datetime | None:
+        suffix = self.SUFFIX if suffix is None else suffix
+        if not name.endswith(suffix):
+            return None
+        try:
+            return datetime.strptime(name[: -len(suffix)], stem_format or self.STEM_FORMAT)
+        except Exception:
+            return None
+
+    def _append(self, dt_local: datetime, data: bytes, header: bytes = b"", t: int | None = None) -> None:
+        path = self._file_for(dt_local)
+        if self._segments is not None and path not in self._segments:
+            dt_seg = self._parse_name(os.path.basename(path))
+            if dt_seg is not None:
+                self._segments[path] = dt_seg
+        self.writer.append(path, data, header, t)
 
     def _ensure_dirs(self) -> None:
         os.makedirs(self.base_dir, exist_ok=True)
 
-    async def async_cleanup(self, match_suffix: str, parse_stem) -> None:
-        self._ensure_dirs()
-        cutoff = dt_util.as_local(dt_util.utcnow()) - timedelta(days=self.keep_days)
+    async def async_flush(self) -> None:
+        await self.writer.async_flush()
+
+    async def async_close(self) -> None:
+        await self.writer.async_close()
 
-        def _cleanup():
-            for root, _dirs, files in os.walk(self.base_dir):
-                for name in files:
-                    if not name.endswith(match_suffix):
+    def _scan_segments(self) -> tuple[dict[str, datetime], dict[str, datetime]]:
+        """(own segment -> start, foreign segment -> end)."""
+        self._ensure_dirs()
+        out: dict[str, datetime] = {}
+        foreign: dict[str, datetime] = {}
+        with os.scandir(self.base_dir) as it:
+            for de in it:
+                if not de.is_file():
+                    continue
+                dt_seg = self._parse_name(de.name)
+                if dt_seg is not None:
+                    out[de.path] = dt_seg
+                    continue
+                for suffix, stem_format, span in self.FOREIGN_SEGMENTS:
+                    dt_seg = self._parse_name(de.name, suffix, stem_format)
+                    if dt_seg is not None:
+                        foreign[de.path] = dt_seg + span
+                        break
+        return out, foreign
+
+    async def _async_segment_index(self) -> dict[str, datetime]:
+        if self._segments is None:
+            self._segments, self._foreign = await self.hass.async_add_executor_job(self._scan_segments)
+            if self._foreign:
+                LOGGER.debug("%s: %s segment(s) of another format, expired by retention only", self.base_dir, len(self._foreign))
+        return self._segments
+
+    async def async_iter_range(self, start_ms: int, end_ms: int) -> AsyncIterator[dict[str, Any]]:
+        """Stream rows with start_ms <= TIME_KEY <= end_ms, oldest first, one segment read at a time."""
+        await self.async_flush()
+        segments = await self._async_segment_index()
+        start_local = dt_util.as_local(datetime.fromtimestamp(start_ms / 1000, tz=dt_util.UTC)).replace(tzinfo=None)
+        end_local = dt_util.as_local(datetime.fromtimestamp(end_ms / 1000, tz=dt_util.UTC)).replace(tzinfo=None)
+        slack = timedelta(hours=1)  # DST shifts between naive local segment names and epoch ms
+        paths = sorted(
+            (dt_seg, p) for p, dt_seg in segments.items()
+            if dt_seg <= end_local + slack and dt_seg + self.SEGMENT_SPAN + slack > start_local
+        )
+        for _dt_seg, p in paths:
+            rows = await self.hass.async_add_executor_job(self._read_segment_range, p, int(start_ms), int(end_ms))
+            for row in rows:
+                yield row
+
+    def _read_segment_range(self, path: str, start_ms: int, end_ms: int) -> list[dict[str, Any]]:
+        # sparse index: seek to the last indexed record at or before start_ms
+        offset = 0
+        try:
+            with open(path + ".idx", "r", encoding="ascii") as f:
+                for line in f:
+                    t_s, _, off_s = line.strip().partition(",")
+                    try:
+                        t_i, off_i = int(t_s), int(off_s)
+                    except ValueError:
                         continue
-                    stem = name.replace(match_suffix, "")
-                    dt_file = parse_stem(stem)
-                    if dt_file is None:
+                    if t_i > start_ms:
+                        break
+                    offset = off_i
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER.debug("Segment index unreadable %s: %s", path, e)
+
+        out: list[dict[str, Any]] = []
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    try:
+                        obj = json.loads(raw)
+                    except Exception:
                         continue
-                    if dt_file < cutoff.replace(tzinfo=None):
-                        try:
-                            os.remove(os.path.join(root, name))
-                        except Exception:
-                            pass
-
-        await self.hass.async_add_executor_job(_cleanup)
+                    t = int(obj.get(self.TIME_KEY, 0) or 0) if isinstance(obj, dict) else 0
+                    if t < start_ms:
+                        continue
+                    if t > end_ms:
+                        break  # rows are appended in time order
+                    out.append(obj)
+        except FileNotFoundError:
+            pass
+        return out
+
+    async def async_sweep_retention(self) -> int:
+        """Delete segments that ended more than keep_days ago; only the first sweep lists the directory."""
+        await self._async_segment_index()
+        cutoff = (dt_util.as_local(dt_util.utcnow()) - timedelta(days=self.keep_days)).replace(tzinfo=None)
+        expired = [p for p, dt_seg in self._segments.items() if dt_seg + self.SEGMENT_SPAN <= cutoff]
+        expired += [p for p, dt_end in self._foreign.items() if dt_end <= cutoff]
+        if not expired:
+            return 0
+        for p in expired:
+            self._segments.pop(p, None)
+            self._foreign.pop(p, None)
+
+        def _remove():
+            for p in expired:
+                for fp in (p, p + ".idx"):
+                    try:
+                        os.remove(fp)
+                    except FileNotFoundError:
+                        pass
+                    except Exception as e:
+                        LOGGER.debug("Retention: cannot remove %s: %s", fp, e)
+
+        await self.hass.async_add_executor_job(_remove)
+        return len(expired)
 
 
 class PumpLogger(_JsonlFiles):
-    def __init__(self, hass: HomeAssistant, keep_days: int) -> None:
-        super().__init__(hass, ["chaac_vwc_logs", "pumps"], keep_days)
+    SUFFIX = "_pumps.jsonl"
+    STEM_FORMAT = "%Y%m%d"
+    TIME_KEY = "ts"
 
-    def _file_for(self, dt_local: datetime) -> str:
-        return os.path.join(self.base_dir, f"{dt_local.strftime('%Y%m%d')}_pumps.jsonl")
+    def __init__(self, hass: HomeAssistant, keep_days: int, log_root: tuple[str, ...] = LOG_ROOT) -> None:
+        super().__init__(hass, [*log_root, "pumps"], keep_days)
 
     async def async_append(self, ev: PumpEvent) -> None:
-        self._ensure_dirs()
         dt_local = dt_util.as_local(datetime.fromtimestamp(ev.ts_ms / 1000, tz=dt_util.UTC))
         line = json.dumps({"ts": ev.ts_ms, "ml": ev.ml, "sec": ev.sec, "phase": ev.phase, "mode": ev.mode}, separators=(",", ":"))
-        path = self._file_for(dt_local)
+        self._append(dt_local, (line + "\n").encode("utf-8"))
 
-        def _write():
-            with open(path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+    def _day_files(self, days: int) -> dict[str, str]:
+        days = max(1, int(days))
+        now_local = dt_util.as_local(dt_util.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = now_local - timedelta(days=days - 1)
+        return {
+            d.strftime("%Y%m%d"): self._file_for(d)
+            for d in (start + timedelta(days=i) for i in range((now_local - start).days + 1))
+        }
 
-        await self.hass.async_add_executor_job(_write)
+    async def async_read_events(self, days: int) -> list[tuple[str, dict[str, Any]]]:
+        """(local day, raw event dict) for the last `days` local days, oldest first."""
+        await self.async_flush()
+        day_files = self._day_files(days)
 
-        def _parse(stem: str):
-            try:
-                return datetime.strptime(stem, "%Y%m%d")
-            except Exception:
-                return None
+        def _read():
+            out: list[tuple[str, dict[str, Any]]] = []
+            for day, p in day_files.items():
+                if not os.path.exists(p):
+                    continue
+                try:
+                    with open(p, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                obj = json.loads(line)
+                            except Exception:
+                                continue
+                            if isinstance(obj, dict):
+                                out.append((day, obj))
+                except Exception:
+                    continue
+            return out
 
-        await self.async_cleanup("_pumps.jsonl", _parse)
+        return await self.hass.async_add_executor_job(_read)
 
-    async def async_sum_ml(self, days: int) -> float:
-        self._ensure_dirs()
-        days = max(1, int(days))
-        now_local = dt_util.as_local(dt_util.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
-        start = now_local - timedelta(days=days - 1)
-        files = [self._file_for(start + timedelta(days=i)) for i in range((now_local - start).days + 1)]
+    async def async_day_totals(self, days: int) -> dict[str, dict[str, float]]:
+        """Per-day {"ml", "sec"} for the last `days` local days, read from the JSONL files."""
+        await self.async_flush()
+        day_files = self._day_files(days)
 
         def _sum():
-            total = 0.0
-            for p in files:
+            out: dict[str, dict[str, float]] = {}
+            for day, p in day_files.items():
                 if not os.path.exists(p):
                     continue
+                ml = sec = 0.0
                 try:
                     with open(p, "r", encoding="utf-8") as f:
                         for line in f:
                             try:
                                 obj = json.loads(line)
-                                total += float(obj.get("ml", 0.0) or 0.0)
+                                ml += float(obj.get("ml", 0.0) or 0.0)
+                                sec += float(obj.get("sec", 0) or 0)
                             except Exception:
                                 continue
                 except Exception:
                     continue
-            return total
+                out[day] = {"ml": ml, "sec": sec}
+            return out
+
+        return await self.hass.async_add_executor_job(_sum)
 
-        return float(await self.hass.async_add_executor_job(_sum))
+    async def async_sum_ml(self, days: int) -> float:
+        totals = await self.async_day_totals(days)
+        return float(sum(c["ml"] for c in totals.values()))
 
 
 class SampleLogger(_JsonlFiles):
-    def __init__(self, hass: HomeAssistant, keep_days: int) -> None:
-        super().__init__(hass, ["chaac_vwc_logs", "samples"], keep_days)
+    SUFFIX = "_sensecap.jsonl"
+    STEM_FORMAT = "%Y%m%d_%H"
+    SEGMENT_SPAN = timedelta(hours=1)
+    INDEX_EVERY = 16
+    FOREIGN_SEGMENTS = (("_sensecap.bin", "%Y%m%d", timedelta(days=1)),)
 
-    def _file_for(self, dt_local: datetime) -> str:
-        return os.path.join(self.base_dir, f"{dt_local.strftime('%Y%m%d_%H')}_sensecap.jsonl")
+    def __init__(self, hass: HomeAssistant, keep_days: int, log_root: tuple[str, ...] = LOG_ROOT) -> None:
+        super().__init__(hass, [*log_root, "samples"], keep_days)
+        self.log_root = log_root
 
     async def async_append(self, sample: dict[str, Any]) -> None:
-        self._ensure_dirs()
         ts_ms = int(sample.get("t", 0) or 0)
         dt_local = dt_util.as_local(datetime.fromtimestamp(ts_ms / 1000, tz=dt_util.UTC))
         line = json.dumps(sample, separators=(",", ":"))
-        path = self._file_for(dt_local)
+        self._append(dt_local, (line + "\n").encode("utf-8"), t=ts_ms)
+
+class BinarySampleLogger(SampleLogger):
+    """Samples as fixed-width records in daily binary segments (see samplefile); JSONL only on export."""
+
+    SUFFIX = "_sensecap.bin"
+    STEM_FORMAT = "%Y%m%d"
+    SEGMENT_SPAN = timedelta(days=1)
+    INDEX_EVERY = 0  # fixed-width records: binary search on t instead of a sidecar index
+    FOREIGN_SEGMENTS = (("_sensecap.jsonl", "%Y%m%d_%H", timedelta(hours=1)),)
+
+    def _on_segment_open(self, f) -> None:
+        removed = samplefile.truncate_torn_tail(f)
+        if removed:
+            LOGGER.warning("Sample segment %s: dropped %s byte(s) of a torn record", f.name, removed)
+
+    def _read_segment_range(self, path: str, start_ms: int, end_ms: int) -> list[dict[str, Any]]:
+        out: list[dict[str, Any]] = []
+        try:
+            with samplefile.SampleSegment(path) as seg:
+                lo = seg.lower_bound(start_ms)
+                for rec in seg.records(lo):
+                    if rec[0] > end_ms:
+                        break
+                    out.append(samplefile.decode_record(rec))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER.debug("Sample segment unreadable %s: %s", path, e)
+        return out
 
-        def _write():
-            with open(path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+    async def async_append(self, sample: dict[str, Any]) -> None:
+        ts_ms = int(sample.get("t", 0) or 0)
+        dt_local = dt_util.as_local(datetime.fromtimestamp(ts_ms / 1000, tz=dt_util.UTC))
+        day_start = dt_local.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._append(dt_local, samplefile.encode_record(sample), samplefile.encode_header(int(day_start.timestamp() * 1000)))
 
-        await self.hass.async_add_executor_job(_write)
+    async def async_export_jsonl(self, day_local: datetime) -> str | None:
+        """Write one day's segment as JSONL under the entry's exports directory; returns the path."""
+        await self.async_flush()
+        src = self._file_for(day_local)
+        dst = self.hass.config.path(*self.log_root, "exports", f"{day_local.strftime('%Y%m%d')}_sensecap.jsonl")
 
-        def _parse(stem: str):
-            try:
-                return datetime.strptime(stem, "%Y%m%d_%H")
-            except Exception:
+        def _export():
+            if not os.path.exists(src):
                 return None
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            with samplefile.SampleSegment(src) as seg, open(dst, "w", encoding="utf-8") as out:
+                for rec in seg.records():
+                    out.write(json.dumps(samplefile.decode_record(rec), separators=(",", ":")) + "\n")
+            return dst
+
+        return await self.hass.async_add_executor_job(_export)
+
+
+class _RollupBucket:
+    """min/max/sum/count per metric for one hour or day, starting at start_ms."""
+
+    __slots__ = ("start_ms", "stats")
+
+    def __init__(self, start_ms: int) -> None:
+        self.start_ms = start_ms
+        self.stats: dict[str, list[float]] = {}
+
+    def add(self, sample: dict[str, Any]) -> None:
+        for key in ROLLUP_METRICS:
+            v = sample.get(key)
+            if v is None:
+                continue
+            try:
+                v = float(v)
+            except (TypeError, ValueError):
+                continue
+            if math.isnan(v):
+                continue
+            st = self.stats.get(key)
+            if st is None:
+                self.stats[key] = [1, v, v, v]
+            else:
+                st[0] += 1
+                st[1] += v
+                st[2] = min(st[2], v)
+                st[3] = max(st[3], v)
+
+    def as_row(self) -> dict[str, Any]:
+        row: dict[str, Any] = {"t": self.start_ms}
+        for key, (n, total, lo, hi) in self.stats.items():
+            row[key] = {"n": int(n), "min": lo, "max": hi, "mean": round(total / n, 4)}
+        return row
+
+
+class RollupLogger(_JsonlFiles):
+    """Closed rollup buckets, one JSON row per bucket; t is the bucket start (local time) in epoch ms."""
+
+    def __init__(self, hass: HomeAssistant, keep_days: int, log_root: tuple[str, ...] = LOG_ROOT) -> None:
+        super().__init__(hass, [*log_root, "rollups"], keep_days)
+        self.keep_days = max(30, int(keep_days))  # long tier: not bound by the raw 2..7 day clamp
+
+    async def async_append(self, row: dict[str, Any]) -> None:
+        ts_ms = int(row["t"])
+        dt_local = dt_util.as_local(datetime.fromtimestamp(ts_ms / 1000, tz=dt_util.UTC))
+        self._append(dt_local, (json.dumps(row, separators=(",", ":")) + "\n").encode("utf-8"))
+
+    async def async_last_t(self) -> int:
+        """Start of the newest written bucket, 0 if none."""
+        await self.async_flush()
+        segments = await self._async_segment_index()
+        if not segments:
+            return 0
+        path = max(segments, key=segments.get)
+
+        def _tail() -> int:
+            last = 0
+            try:
+                with open(path, "rb") as f:
+                    for raw in f:
+                        try:
+                            last = max(last, int(json.loads(raw).get("t", 0) or 0))
+                        except Exception:
+                            continue
+            except FileNotFoundError:
+                pass
+            return last
+
+        return await self.hass.async_add_executor_job(_tail)
+
+
+class HourlyRollupLogger(RollupLogger):
+    SUFFIX = "_hourly.jsonl"
+    STEM_FORMAT = "%Y%m"
+    SEGMENT_SPAN = timedelta(days=31)
+
+
+class DailyRollupLogger(RollupLogger):
+    SUFFIX = "_daily.jsonl"
+    STEM_FORMAT = "%Y"
+    SEGMENT_SPAN = timedelta(days=366)
+
+
+class SampleRollups:
+    """Hourly and daily min/max/mean/count of the soil metrics, updated as samples are logged.
+
+    The open (current) buckets live in memory; async_setup rebuilds them and any buckets missed
+    while HA was down by replaying the raw samples that are still on disk.
+    """
+
+    def __init__(self, hass: HomeAssistant, hourly_keep_days: int, log_root: tuple[str, ...] = LOG_ROOT) -> None:
+        self.hass = hass
+        # log_root is per entry: buckets (and the raw samples replayed into them) never mix entries
+        self.tiers: dict[str, RollupLogger] = {
+            "hourly": HourlyRollupLogger(hass, hourly_keep_days, log_root),
+            "daily": DailyRollupLogger(hass, ROLLUP_DAILY_KEEP_DAYS, log_root),
+        }
+        self._open: dict[str, _RollupBucket | None] = {"hourly": None, "daily": None}
+        # start of the newest bucket already on disk, per tier; older buckets are never rewritten
+        self._written: dict[str, int] = {"hourly": 0, "daily": 0}
+
+    @staticmethod
+    def _bucket_starts(ts_ms: int) -> dict[str, int]:
+        dt_local = dt_util.as_local(datetime.fromtimestamp(ts_ms / 1000, tz=dt_util.UTC))
+        hour = dt_local.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        return {"hourly": int(hour.timestamp() * 1000), "daily": int(day.timestamp() * 1000)}
+
+    async def async_setup(self, sample_logger: SampleLogger) -> None:
+        for tier, lg in self.tiers.items():
+            self._written[tier] = await lg.async_last_t()
+        now_ms = int(dt_util.utcnow().timestamp() * 1000)
+        raw_start = now_ms - sample_logger.keep_days * 86400000
+        start_ms = max(raw_start, min(self._written["daily"] + 86400000, self._written["hourly"] + 3600000))
+        n = 0
+        async for sample in sample_logger.async_iter_range(start_ms, now_ms):
+            await self.async_add(sample)
+            n += 1
+        LOGGER.debug("Rollups: replayed %s raw sample(s)", n)
+
+    async def async_add(self, sample: dict[str, Any]) -> None:
+        ts_ms = int(sample.get("t", 0) or 0)
+        if ts_ms <= 0:
+            return
+        for tier, start_ms in self._bucket_starts(ts_ms).items():
+            if start_ms <= self._written[tier]:
+                continue
+            bucket = self._open[tier]
+            if bucket is None or start_ms > bucket.start_ms:
+                if bucket is not None:
+                    await self.tiers[tier].async_append(bucket.as_row())
+                    self._written[tier] = bucket.start_ms
+                bucket = self._open[tier] = _RollupBucket(start_ms)
+            elif start_ms < bucket.start_ms:
+                continue  # late sample for a bucket that is already closed
+            bucket.add(sample)
+
+    async def async_query(self, tier: str, start_ms: int, end_ms: int) -> list[dict[str, Any]]:
+        """Buckets starting within [start_ms, end_ms]; the still-open bucket is included as partial."""
+        rows = [row async for row in self.tiers[tier].async_iter_range(start_ms, end_ms)]
+        bucket = self._open[tier]
+        if bucket is not None and start_ms <= bucket.start_ms <= end_ms:
+            rows.append({**bucket.as_row(), "partial": True})
+        return rows
+
+    async def async_close(self) -> None:
+        # open buckets are rebuilt from raw samples on the next start
+        for lg in self.tiers.values():
+            await lg.async_close()
+
+
+def entry_log_root(entry_id: str) -> tuple[str, ...]:
+    return (*LOG_ROOT, entry_id) if entry_id else LOG_ROOT
+
+
+def _move_legacy_logs(root: str, entry_id: str) -> list[str]:
+    dst_dir = os.path.join(root, entry_id)
+    moved = []
+    for name in LEGACY_LOG_ITEMS:
+        src, dst = os.path.join(root, name), os.path.join(dst_dir, name)
+        if os.path.exists(src) and not os.path.exists(dst):
+            os.makedirs(dst_dir, exist_ok=True)
+            os.replace(src, dst)
+            moved.append(name)
+    return moved
+
+
+async def async_migrate_legacy_logs(hass: HomeAssistant, entry_id: str) -> None:
+    """Move the pre-sharding shared logs into this entry's log directory (first entry wins)."""
+    if not entry_id:
+        return
+    # entries may set up concurrently; only one of them may take over the legacy logs
+    lock = hass.data.setdefault(DATA_LOG_MIGRATE_LOCK, asyncio.Lock())
+    async with lock:
+        moved = await hass.async_add_executor_job(_move_legacy_logs, hass.config.path(*LOG_ROOT), entry_id)
+    if moved:
+        LOGGER.info("Moved shared logs %s into %s", ", ".join(moved), os.path.join(*LOG_ROOT, entry_id))
+
+
+async def async_remove_entry_logs(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete a removed entry's log directory (samples, rollups, pump history, exports)."""
+    if not entry_id:
+        return  # never the shared root
+    path = hass.config.path(*entry_log_root(entry_id))
+    await hass.async_add_executor_job(partial(shutil.rmtree, path, ignore_errors=True))
+
+
+def _parse_pump_windows(spec: str) -> list[str]:
+    # "30,90,365,season" -> ["30d", "90d", "365d", "season"]; 1d/7d always exist already
+    out: list[str] = []
+    for part in spec.replace(";", ",").split(","):
+        p = part.strip().lower().rstrip("d")
+        if p == "season":
+            key = "season"
+        elif p.isdigit() and int(p) > 0:
+            key = f"{int(p)}d"
+        else:
+            continue
+        if key not in ("1d", "7d") and key not in out:
+            out.append(key)
+    return out
 
-        await self.async_cleanup("_sensecap.jsonl", _parse)
+
+def _month_day(year: int, month: int, day: int) -> date:
+    # "02-29" in a non-leap year -> Feb 28
+    return date(year, month, max(1, min(day, calendar.monthrange(year, month)[1])))
+
+
+def _pump_window_start(window: str, today, season_start: str) -> int:
+    """First local day (YYYYMMDD int) included in a pump window."""
+    if window == "season":
+        try:
+            month, day = (int(x) for x in season_start.split("-", 1))
+            start = _month_day(today.year, month, day)
+        except Exception:
+            start = today.replace(month=1, day=1)
+        if start > today:
+            start = _month_day(today.year - 1, month, day)
+    else:
+        start = today - timedelta(days=int(window[:-1]) - 1)
+    return int(start.strftime("%Y%m%d"))
 
 
 class SenseCapVwcControllerSingle:
@@ -372,46 +1086,294 @@ class SenseCapVwcControllerSingle:
         enabled: bool,
         cfg: dict[str, Any],
         persisted_state,
+        shelly_session: aiohttp.ClientSession | None = None,
+        entry_id: str = "",
+        save_state: Callable[[], Awaitable[None]] | None = None,
     ) -> None:
         self.hass = hass
+        self.entry_id = entry_id
+        # per-entry log directory, so entries never mix samples, rollups or pump history
+        self.log_root = entry_log_root(entry_id)
         self.session = session
+        self.shelly_session = shelly_session or session
         self.station = station
         self.sensor_source = str(cfg.get('sensorSource', 'sensecap_cloud'))
         self.client = None
         if self.sensor_source != 'ha_entity':
-            self.client = SenseCapCloudClient(session=session, station=station, access_id=access_id, access_key=access_key)
+            self.client = SenseCapCloudClient(
+                session=session,
+                station=station,
+                access_id=access_id,
+                access_key=access_key,
+                hedge_delay_s=max(0.0, float(cfg.get("hedgeDelaySeconds", 0.0) or 0.0)),
+                shared_cache=async_get_fetch_cache(hass),
+            )
 
         self.poll_seconds = max(10, int(poll_seconds))
         self.enabled = bool(enabled)
+
+        # Fetch all measurements of one poll in parallel (bounded) and give up after pollDeadlineSeconds.
+        self.concurrent_fetch = bool(cfg.get("concurrentFetch", True))
+        self.fetch_concurrency = max(1, min(len(MEASUREMENT_IDS), int(cfg.get("fetchConcurrency", 3) or 3)))
+        self.poll_deadline = max(5, min(self.poll_seconds, int(cfg.get("pollDeadlineSeconds", 30) or 30)))
+        # One openapi request for all measurements; per-measurement fetch only if that fails.
+        self.batch_fetch = bool(cfg.get("batchFetch", True))
+        # Poll right after the device's learned upload period instead of every pollSeconds.
+        self.adaptive_poll = bool(cfg.get("adaptivePoll", False))
+        self.cadence = UploadCadence()
+        # Outside P1/P2 (with checkOnlyInPlantTimes) poll every offWindowPollSeconds (0 = not at all)
+        # and wake up at the next window start.
+        self.window_polling = bool(cfg.get("windowPolling", False)) and bool(cfg.get("checkOnlyInPlantTimes", True))
+        self.off_window_poll_seconds = max(0, int(cfg.get("offWindowPollSeconds", 900) or 0))
+        # Per-measurement fetch only: non-moisture measurements every Nth poll, cached in between.
+        self.slow_metric_every = max(1, int(cfg.get("slowMetricEvery", 1) or 1))
+        self._poll_cycle = 0
+        self._metric_cache: dict[str, FetchResult] = {}
+        # "<eui>:<channel>" -> measurement key -> (consecutive empty polls, loop time before which
+        # it is skipped); per device so fleet devices get their own negative cache
+        self._no_data: dict[str, dict[str, tuple[int, float]]] = {}
+        # "<eui>:<channel>" -> loop time of the next discovery attempt after one that found nothing
+        self._discover_retry_at: dict[str, float] = {}
         self.cfg = cfg
         self.persisted_state = persisted_state
-
-        self.sample_logger = SampleLogger(hass, keep_days)
-        self.pump_logger = PumpLogger(hass, keep_days)
+        # writes persisted_state now; pump events can't wait for the delayed save (a restart in
+        # between would lose last_pump_ts_ms and let plantIntervalMinutes water again)
+        self._save_state = save_state
+
+        # "jsonl" (default) or "binary" fixed-width daily segments
+        self.sample_format = str(cfg.get("sampleFormat", "jsonl") or "jsonl")
+        if self.sample_format == "binary":
+            self.sample_logger: SampleLogger = BinarySampleLogger(hass, keep_days, self.log_root)
+        else:
+            self.sample_logger = SampleLogger(hass, keep_days, self.log_root)
+        self.pump_logger = PumpLogger(hass, keep_days, self.log_root)
+        # hourly/daily summaries; hourly kept rollupKeepDays, daily ~10 years
+        self.rollups = SampleRollups(hass, int(cfg.get("rollupKeepDays", 400) or 400), self.log_root)
+        # last rollingHours of samples in memory for rolling mean/min/max and moisture slope
+        self.recent = RecentSamples(max(1, min(48, int(cfg.get("rollingHours", 6) or 6))))
         self._pending_off: Any = None
+        self._pending_off_target: tuple[str, int, bool] | None = None  # (host, plug id, verify_only)
 
         self._totals_dirty = True
-        self.pump_totals: dict[str, Any] = {"1d": 0.0, "7d": 0.0}
+        self.pump_totals: dict[str, Any] = {"1d": 0.0, "7d": 0.0, "1d_sec": 0.0, "7d_sec": 0.0}
+
+        # Optional SQLite pump history for longer windows ("30d", "90d", "365d", "season", ...)
+        self.pump_db: PumpEventStore | None = None
+        self.pump_windows: list[str] = []
+        if cfg.get("pumpDb", False):
+            self.pump_db = PumpEventStore(hass, hass.config.path(*self.log_root, "pumps.db"))
+            self.pump_windows = _parse_pump_windows(str(cfg.get("pumpWindows", "30,90,365,season") or ""))
+            for w in self.pump_windows:
+                self.pump_totals.setdefault(w, 0.0)
+                self.pump_totals.setdefault(f"{w}_sec", 0.0)
+        self._db_totals_day = ""
+
+        self._unsubs: list[Any] = []
+
+        # Let the plug switch itself off (toggle_after / timer); the HA timer only verifies.
+        self.device_auto_off = bool(cfg.get("deviceAutoOff", False))
+
+    def _windows(self) -> list[tuple[str, int, int]]:
+        cfg = self.cfg
+        p1s = int(cfg.get("p1StartHour", 0)) * 60 + int(cfg.get("p1StartMinute", 0))
+        p1e = int(cfg.get("p1EndHour", 0)) * 60 + int(cfg.get("p1EndMinute", 0))
+        p2s = int(cfg.get("p2StartHour", 0)) * 60 + int(cfg.get("p2StartMinute", 0))
+        p2e = int(cfg.get("p2EndHour", 0)) * 60 + int(cfg.get("p2EndMinute", 0))
+        return [("P1", p1s, p1e), ("P2", p2s, p2e)]
+
+    async def async_setup(self) -> None:
+        try:
+            await async_migrate_legacy_logs(self.hass, self.entry_id)
+        except Exception as e:
+            LOGGER.warning("Moving shared logs into %s failed: %s", os.path.join(*self.log_root), e)
+        try:
+            await self.rollups.async_setup(self.sample_logger)
+        except Exception as e:
+            LOGGER.debug("Rollups: replay failed: %s", e)
+        try:
+            now_ms = int(dt_util.utcnow().timestamp() * 1000)
+            async for sample in self.sample_logger.async_iter_range(now_ms - self.recent.window_ms, now_ms):
+                self.recent.push(sample)
+        except Exception as e:
+            LOGGER.debug("Recent samples: preload failed: %s", e)
+        if self.pump_db is not None:
+            try:
+                empty = await self.pump_db.async_open()
+                if empty:
+                    await self._async_backfill_pump_db()
+            except Exception as e:
+                LOGGER.warning("Pump history database unavailable (%s), longer pump windows disabled", e)
+                self.pump_db = None
+                # no long-window sensors that would sit at 0 forever
+                for w in self.pump_windows:
+                    self.pump_totals.pop(w, None)
+                    self.pump_totals.pop(f"{w}_sec", None)
+                self.pump_windows = []
+
+    async def _async_backfill_pump_db(self) -> None:
+        rows = []
+        for day, obj in await self.pump_logger.async_read_events(self.pump_logger.keep_days):
+            try:
+                rows.append((int(day), int(obj.get("ts", 0) or 0), float(obj.get("ml", 0.0) or 0.0), float(obj.get("sec", 0) or 0), str(obj.get("phase", "") or ""), str(obj.get("mode", "") or "")))
+            except Exception:
+                continue
+        await self.pump_db.async_add_many(rows)
+        LOGGER.debug("Pump history database backfilled with %s event(s)", len(rows))
+
+    @callback
+    def async_start(self) -> None:
+        cfg = self.cfg
+
+        # log retention: hourly sweep over the in-memory segment index (first run lists the dirs)
+        self._unsubs.append(async_track_time_interval(self.hass, self._async_retention_sweep, RETENTION_SWEEP_INTERVAL))
+        self.hass.async_create_task(self._async_retention_sweep(None))
 
-    async def schedule_off(self, host: str, plug_id: int, seconds: int) -> None:
+        host = (cfg.get("plugHost") or "").strip()
+        if cfg.get("plugEnabled") and host and cfg.get("shellyPrewarm", True):
+            for _name, start, end in self._windows():
+                if start == end:
+                    continue
+                at = (start * 60 - SHELLY_PREWARM_LEAD_S) % 86400
+                self._unsubs.append(
+                    async_track_time_change(
+                        self.hass, self._async_prewarm, hour=at // 3600, minute=(at // 60) % 60, second=at % 60
+                    )
+                )
+
+    async def _async_retention_sweep(self, _now) -> None:
+        for lg in (self.sample_logger, self.pump_logger, *self.rollups.tiers.values()):
+            try:
+                removed = await lg.async_sweep_retention()
+                if removed:
+                    LOGGER.debug("Retention: removed %s segment(s) from %s", removed, lg.base_dir)
+            except Exception as e:
+                LOGGER.debug("Retention sweep failed for %s: %s", lg.base_dir, e)
+
+    async def _async_prewarm(self, _now) -> None:
+        host = (self.cfg.get("plugHost") or "").strip()
+        ok = await shelly_prewarm(self.shelly_session, host)
+        LOGGER.debug("Shelly pre-warm host=%s ok=%s", host, ok)
+
+    async def async_shutdown(self) -> None:
+        while self._unsubs:
+            self._unsubs.pop()()
+        await self._async_off_now()
+        await self.sample_logger.async_close()
+        await self.pump_logger.async_close()
+        await self.rollups.async_close()
+        if self.pump_db is not None:
+            await self.pump_db.async_close()
+
+    async def async_pump_on(self, host: str, plug_id: int, seconds: float) -> bool:
+        """Switch the pump on for `seconds` (fractional when the plug times itself)."""
+        seconds = max(0.5 if self.device_auto_off else 1.0, float(seconds))
+        user = str(self.cfg.get('plugUser', '') or '')
+        password = str(self.cfg.get('plugPass', '') or '')
+        ok = await shelly_set_switch(
+            self.shelly_session, host, plug_id, True, user=user, password=password,
+            toggle_after=seconds if self.device_auto_off else None,
+        )
+        if ok:
+            await self.schedule_off(host, plug_id, int(math.ceil(seconds)), verify_only=self.device_auto_off)
+        return ok
+
+    async def schedule_off(self, host: str, plug_id: int, seconds: int, verify_only: bool = False) -> None:
         seconds = max(1, int(seconds))
         if callable(self._pending_off):
             self._pending_off()
             self._pending_off = None
+            self._pending_off_target = None
 
         async def _do_off(_now):
-            await shelly_set_switch(self.session, host, plug_id, False, user=str(self.cfg.get('plugUser','') or ''), password=str(self.cfg.get('plugPass','') or ''))
             self._pending_off = None
-
-        self._pending_off = async_call_later(self.hass, seconds, _do_off)
+            self._pending_off_target = None
+            user = str(self.cfg.get('plugUser', '') or '')
+            password = str(self.cfg.get('plugPass', '') or '')
+            if verify_only:
+                # backstop: the plug should already be off by itself
+                if await shelly_get_switch(self.shelly_session, host, plug_id, user=user, password=password) is False:
+                    return
+                LOGGER.debug("Shelly auto-off not confirmed host=%s id=%s, switching off", host, plug_id)
+            await shelly_set_switch(self.shelly_session, host, plug_id, False, user=user, password=password)
+
+        # verification runs a little after the device-side timer should have fired
+        self._pending_off = async_call_later(self.hass, seconds + (3 if verify_only else 0), _do_off)
+        self._pending_off_target = (host, plug_id, verify_only)
+
+    async def _async_off_now(self) -> None:
+        """Unload/stop during a dose: switch off now, the timer would fire on a closed session."""
+        if not callable(self._pending_off):
+            return
+        self._pending_off()
+        self._pending_off = None
+        host, plug_id, verify_only = self._pending_off_target
+        self._pending_off_target = None
+        if verify_only:
+            return  # the plug's own timer switches it off
+        LOGGER.debug("Shutdown during a dose: switching off host=%s id=%s now", host, plug_id)
+        await shelly_set_switch(
+            self.shelly_session, host, plug_id, False,
+            user=str(self.cfg.get('plugUser', '') or ''), password=str(self.cfg.get('plugPass', '') or ''),
+        )
 
     async def _update_totals_if_dirty(self) -> None:
-        if not self._totals_dirty:
-            return
-        self.pump_totals["1d"] = float(await self.pump_logger.async_sum_ml(1))
-        self.pump_totals["7d"] = float(await self.pump_logger.async_sum_ml(7))
+        # Totals come from the persisted per-day counters (O(days)); the JSONL files are only
+        # scanned when the counters are missing or were found corrupt.
+        ps = self.persisted_state
+        if ps.pump_days is None:
+            ps.pump_days = await self.pump_logger.async_day_totals(PUMP_DAY_COUNTERS_KEEP)
+            LOGGER.debug("Pump counters rebuilt from logs: %s day(s)", len(ps.pump_days))
+        today = dt_util.as_local(dt_util.utcnow()).date()
+        for days in (1, 7):
+            keys = {(today - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)}
+            counters = [c for k, c in ps.pump_days.items() if k in keys]
+            self.pump_totals[f"{days}d"] = float(sum(c.get("ml", 0.0) for c in counters))
+            self.pump_totals[f"{days}d_sec"] = float(sum(c.get("sec", 0.0) for c in counters))
+
+        # long windows: one indexed query each, only after a pump event or at day rollover
+        if self.pump_db is not None and self.pump_windows and (self._totals_dirty or self._db_totals_day != today.isoformat()):
+            starts = {w: _pump_window_start(w, today, str(self.cfg.get("seasonStart", "03-01") or "03-01")) for w in self.pump_windows}
+            try:
+                for w, (ml, sec) in (await self.pump_db.async_totals_since(starts)).items():
+                    self.pump_totals[w] = ml
+                    self.pump_totals[f"{w}_sec"] = sec
+                self._db_totals_day = today.isoformat()
+            except Exception as e:
+                LOGGER.debug("Pump window totals failed: %s", e)
         self._totals_dirty = False
 
+    async def async_record_pump(self, ev: PumpEvent) -> None:
+        await self.pump_logger.async_append(ev)
+        day = dt_util.as_local(datetime.fromtimestamp(ev.ts_ms / 1000, tz=dt_util.UTC)).strftime("%Y%m%d")
+        if self.pump_db is not None:
+            try:
+                await self.pump_db.async_add(int(day), ev.ts_ms, ev.ml, ev.sec, ev.phase, ev.mode)
+            except Exception as e:
+                LOGGER.debug("Pump history database write failed: %s", e)
+        ps = self.persisted_state
+        if ps.pump_days is not None:
+            c = ps.pump_days.setdefault(day, {"ml": 0.0, "sec": 0.0})
+            c["ml"] = float(c.get("ml", 0.0)) + float(ev.ml)
+            c["sec"] = float(c.get("sec", 0.0)) + float(ev.sec)
+            if len(ps.pump_days) > PUMP_DAY_COUNTERS_KEEP:
+                for k in sorted(ps.pump_days)[: len(ps.pump_days) - PUMP_DAY_COUNTERS_KEEP]:
+                    del ps.pump_days[k]
+            ps.mark_dirty()
+        self._totals_dirty = True
+        if self._save_state is not None:
+            try:
+                await self._save_state()
+            except Exception as e:
+                LOGGER.debug("State save after pump event failed: %s", e)
+
+    def _active_phase(self) -> str:
+        now_local = dt_util.as_local(dt_util.utcnow())
+        now_min = now_local.hour * 60 + now_local.minute
+        for name, start, end in reversed(self._windows()):
+            if _is_time_in_window_minutes(start, end, now_min):
+                return name
+        return ""
+
     async def _pump_auto_if_needed(self, sample: dict[str, Any]) -> bool:
         cfg = self.cfg
         if not cfg.get("plugEnabled"):
@@ -425,10 +1387,7 @@ class SenseCapVwcControllerSingle:
         now_min = now_local.hour * 60 + now_local.minute
         now_ms = int(now_utc.timestamp() * 1000)
 
-        p1s = int(cfg.get("p1StartHour", 0)) * 60 + int(cfg.get("p1StartMinute", 0))
-        p1e = int(cfg.get("p1EndHour", 0)) * 60 + int(cfg.get("p1EndMinute", 0))
-        p2s = int(cfg.get("p2StartHour", 0)) * 60 + int(cfg.get("p2StartMinute", 0))
-        p2e = int(cfg.get("p2EndHour", 0)) * 60 + int(cfg.get("p2EndMinute", 0))
+        (_, p1s, p1e), (_, p2s, p2e) = self._windows()
 
         in_p1 = _is_time_in_window_minutes(p1s, p1e, now_min)
         in_p2 = _is_time_in_window_minutes(p2s, p2e, now_min)
@@ -464,44 +1423,270 @@ class SenseCapVwcControllerSingle:
         if use_seconds:
             seconds = max(1, int(cfg.get("pumpSeconds", 5) or 1))
             ml = seconds * ml_per_sec
+            dose_s = float(seconds)
         else:
             ml = max(0.0, float(cfg.get("pumpMl", 200.0) or 0.0))
             seconds = max(1, int(math.ceil(ml / ml_per_sec)))
+            # device-side timer can dose sub-second; HA timer needs whole seconds
+            dose_s = ml / ml_per_sec if self.device_auto_off else float(seconds)
 
         plug_id = int(cfg.get("plugId", 0) or 0)
 
-        ok = await shelly_set_switch(self.session, host, plug_id, True, user=str(cfg.get('plugUser','') or ''), password=str(cfg.get('plugPass','') or ''))
+        ok = await self.async_pump_on(host, plug_id, dose_s)
         if not ok:
             return False
 
-        await self.schedule_off(host, plug_id, seconds)
-
-        ev = PumpEvent(ts_ms=now_ms, ml=float(ml), sec=int(seconds), phase=("P2" if active_p2 else "P1"), mode="auto")
-        await self.pump_logger.async_append(ev)
-        self._totals_dirty = True
-
         self.persisted_state.last_pump_ts_ms = now_ms
+        ev = PumpEvent(ts_ms=now_ms, ml=float(ml), sec=int(seconds), phase=("P2" if active_p2 else "P1"), mode="auto")
+        await self.async_record_pump(ev)
         return True
 
+    def _due_measurements(self, device_eui: str, channel_index: int, tiered: bool = False) -> dict[str, int]:
+        """Measurements to ask the device for; soilMoist is always included.
+
+        Measurements the device doesn't report (discovery) or that keep coming back empty
+        (negative cache) are skipped. tiered (the entry's own device): the others only every
+        slowMetricEvery-th poll (or until cached).
+        """
+        slow_due = True
+        if tiered:
+            self._poll_cycle += 1
+            slow_due = self.slow_metric_every <= 1 or (self._poll_cycle - 1) % self.slow_metric_every == 0
+        dev = f"{device_eui}:{channel_index}"
+        cap = self.persisted_state.capabilities.get(dev)
+        supported = set(cap["mids"]) if cap else None
+        no_data = self._no_data.get(dev, {})
+        now = self.hass.loop.time()
+        due = {}
+        for key, mid in MEASUREMENT_IDS.items():
+            if key not in FAST_MEASUREMENTS:
+                if supported is not None and mid not in supported:
+                    continue
+                if no_data.get(key, (0, 0.0))[1] > now:
+                    continue
+                if not slow_due and key in self._metric_cache:
+                    continue
+            due[key] = mid
+        return due
+
+    async def async_fetch_device(
+        self, device_eui: str, channel_index: int, on_moist: Any = None, tiered: bool = False
+    ) -> dict[str, FetchResult]:
+        """Latest values of one device channel with discovery and negative caching applied.
+
+        Used by poll_once (tiered=True) and by the fleet poller for its extra devices.
+        """
+        try:
+            await self._async_discover(device_eui, channel_index)
+        except Exception as e:
+            LOGGER.debug("Capability discovery failed for %s:%s: %s", device_eui, channel_index, e)
+        results = await self._fetch_measurements(
+            device_eui, channel_index, self._due_measurements(device_eui, channel_index, tiered), on_moist
+        )
+        if any(fr.ok for fr in results.values()):
+            self._note_empty_results(device_eui, channel_index, results)
+        return results
+
+    async def _async_discover(self, device_eui: str, channel_index: int) -> None:
+        """One listing request per device channel; refreshed after CAPABILITY_REFRESH_S."""
+        ps = self.persisted_state
+        key = f"{device_eui}:{channel_index}"
+        now_s = int(dt_util.utcnow().timestamp())
+        cap = ps.capabilities.get(key)
+        if cap is not None and now_s - cap["ts"] < CAPABILITY_REFRESH_S:
+            return
+        if self.hass.loop.time() < self._discover_retry_at.get(key, 0.0):
+            return
+        mids = await self.client.discover_measurements(device_eui, channel_index)
+        if not mids:
+            self._discover_retry_at[key] = self.hass.loop.time() + CAPABILITY_RETRY_S
+            LOGGER.debug("Capability discovery for %s gave no measurements, retry in %ss", key, CAPABILITY_RETRY_S)
+            return
+        ps.capabilities = {**ps.capabilities, key: {"mids": sorted(mids), "ts": now_s}}
+        missing = [k for k, mid in MEASUREMENT_IDS.items() if mid not in mids]
+        LOGGER.debug("Capabilities %s: %s (not reported: %s)", key, sorted(mids), missing or "-")
+
+    def _note_empty_results(self, device_eui: str, channel_index: int, results: dict[str, FetchResult]) -> None:
+        # only answers without a value count; timeouts, transport errors and an open breaker
+        # say nothing about whether the device reports the measurement
+        dev = f"{device_eui}:{channel_index}"
+        no_data = self._no_data.setdefault(dev, {})
+        now = self.hass.loop.time()
+        for key, fr in results.items():
+            if fr.ok:
+                no_data.pop(key, None)
+            elif fr.no_data and key not in FAST_MEASUREMENTS:
+                fails = no_data.get(key, (0, 0.0))[0] + 1
+                skip_until = 0.0
+                if fails >= NO_DATA_AFTER_FAILS:
+                    skip_until = now + min(NO_DATA_RECHECK_MAX_S, NO_DATA_RECHECK_BASE_S * 2 ** (fails - NO_DATA_AFTER_FAILS))
+                    LOGGER.debug("No data for %s %s %s times, re-check in %ss", dev, key, fails, int(skip_until - now))
+                no_data[key] = (fails, skip_until)
+
+    async def _fetch_measurements(
+        self, device_eui: str, channel_index: int, measurement_ids: dict[str, int], on_moist: Any = None
+    ) -> dict[str, FetchResult]:
+        """Fetch measurement_ids; on_moist(FetchResult) is awaited as soon as soilMoist is back."""
+        if self.batch_fetch:
+            # one request returns every measurement of the channel, so tiers don't apply here
+            results, moist = await self._fetch_batch(device_eui, channel_index, measurement_ids, on_moist)
+            if any(fr.ok for fr in results.values()):
+                if moist is not None:
+                    if not results.get("soilMoist", moist).ok:
+                        results = {**results, "soilMoist": moist}
+                elif on_moist is not None and "soilMoist" in results:
+                    await on_moist(results["soilMoist"])
+                return results
+            LOGGER.debug("Batch fetch failed (%s), falling back to per-measurement fetch", next((fr.err for fr in results.values() if fr.err), "timeout"))
+            if moist is not None:
+                # the hedged moisture read already answered (and was decided on)
+                rest = {k: mid for k, mid in measurement_ids.items() if k != "soilMoist"}
+                return {**await self._fetch_each(device_eui, channel_index, rest), "soilMoist": moist}
+        return await self._fetch_each(device_eui, channel_index, measurement_ids, on_moist)
+
+    async def _fetch_batch(
+        self, device_eui: str, channel_index: int, measurement_ids: dict[str, int], on_moist: Any = None
+    ) -> tuple[dict[str, FetchResult], FetchResult | None]:
+        """(batch results or {} on deadline, hedged soilMoist already passed to on_moist or None).
+
+        With hedgeDelaySeconds > 0 a slow batch request is raced by a v1 moisture read, so the
+        watering decision doesn't wait for the openapi timeout; the batch keeps running for the rest.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.poll_deadline
+        batch = asyncio.ensure_future(self.client.fetch_latest_batch(device_eui, channel_index, MEASUREMENT_IDS))
+        hedge: asyncio.Future | None = None
+        moist: FetchResult | None = None
+        try:
+            delay = self.client.hedge_delay_s
+            if delay > 0 and "soilMoist" in measurement_ids:
+                done, _ = await asyncio.wait([batch], timeout=min(delay, self.poll_deadline))
+                if not done:
+                    hedge = asyncio.ensure_future(
+                        self.client.fetch_latest_v1(device_eui, channel_index, measurement_ids["soilMoist"])
+                    )
+                    done, _ = await asyncio.wait(
+                        [batch, hedge], timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if hedge in done and hedge.exception() is None and hedge.result().ok:
+                        moist = hedge.result()
+                        if on_moist is not None:
+                            await on_moist(moist)
+            done, _ = await asyncio.wait([batch], timeout=max(0.0, deadline - loop.time()))
+            results = batch.result() if batch in done and batch.exception() is None else {}
+        finally:
+            unfinished = [t for t in (batch, hedge) if t is not None and not t.done()]
+            for t in unfinished:
+                t.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+        return results, moist
+
+    async def _fetch_each(
+        self, device_eui: str, channel_index: int, measurement_ids: dict[str, int], on_moist: Any = None
+    ) -> dict[str, FetchResult]:
+        # soilMoist first: it is the only measurement the watering decision needs
+        ordered = sorted(measurement_ids.items(), key=lambda kv: kv[0] != "soilMoist")
+        if not self.concurrent_fetch:
+            results: dict[str, FetchResult] = {}
+            for key, mid in ordered:
+                results[key] = await self.client.fetch_latest(device_eui, channel_index, mid)
+                if key == "soilMoist" and on_moist is not None:
+                    await on_moist(results[key])
+            return results
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.poll_deadline
+        sem = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def _one(mid: int) -> FetchResult:
+            async with sem:
+                return await self.client.fetch_latest(device_eui, channel_index, mid)
+
+        tasks = {key: asyncio.ensure_future(_one(mid)) for key, mid in ordered}
+        try:
+            moist_task = tasks.get("soilMoist")
+            if moist_task is not None and on_moist is not None:
+                # decide while the remaining measurements are still in flight
+                done, _ = await asyncio.wait([moist_task], timeout=self.poll_deadline)
+                if moist_task in done and moist_task.exception() is None:
+                    await on_moist(moist_task.result())
+            _done, pending = await asyncio.wait(tasks.values(), timeout=max(0.0, deadline - loop.time()))
+        finally:
+            # deadline hit or the caller (poll, fleet task) was cancelled: don't leave fetches running
+            unfinished = [t for t in tasks.values() if not t.done()]
+            for t in unfinished:
+                t.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+        if pending:
+            LOGGER.debug("Poll deadline (%ss) hit, %s measurement(s) cancelled", self.poll_deadline, len(pending))
 
-async def on_external_sample(self, sample: dict[str, Any]) -> None:
-    """Accept external sample (e.g. from HA entity) and run decision."""
-    try:
-        self.persisted_state.last_sample = dict(sample)
-    except Exception:
-        pass
-    try:
-        await self.sample_logger.async_append(sample)
-    except Exception:
-        pass
-    try:
-        await self._pump_auto_if_needed(sample)
-    except Exception:
-        pass
-    try:
-        await self._update_totals_if_dirty()
-    except Exception:
-        pass
+        results = {}
+        for key, t in tasks.items():
+            if t in pending:
+                results[key] = FetchResult(False, None, 0, f"timeout after {self.poll_deadline}s")
+            elif t.exception() is not None:
+                results[key] = FetchResult(False, None, 0, str(t.exception()))
+            else:
+                results[key] = t.result()
+        return results
+
+    def _seconds_to_next_window(self, now_local: datetime) -> int | None:
+        """None if now is inside P1/P2 (or no window is configured), else seconds until the next start."""
+        now_s = now_local.hour * 3600 + now_local.minute * 60 + now_local.second
+        waits = []
+        for _name, start, end in self._windows():
+            if start == end:
+                continue
+            if _is_time_in_window_minutes(start, end, now_s // 60):
+                return None
+            waits.append((start * 60 - now_s) % 86400)
+        return min(waits) if waits else None
+
+    def next_poll_seconds(self) -> float:
+        """Delay until the coordinator's next poll_once."""
+        if getattr(self, "sensor_source", "sensecap_cloud") == "ha_entity":
+            return float(self.poll_seconds)
+        now = dt_util.utcnow()
+        delay = float(self.poll_seconds)
+        if self.adaptive_poll:
+            delay = self.cadence.next_poll_s(int(now.timestamp() * 1000), delay)
+        retry_in = self.client.breaker_retry_in() if self.client else None
+        if retry_in:
+            # wake up when the breaker lets the half-open probe through
+            delay = max(delay, retry_in + 1)
+        if self.window_polling:
+            to_start = self._seconds_to_next_window(dt_util.as_local(now))
+            if to_start is not None:
+                # +1 s so the wake-up lands inside the window
+                wake = float(to_start + 1)
+                delay = wake if self.off_window_poll_seconds <= 0 else min(wake, max(delay, float(self.off_window_poll_seconds)))
+        return delay
+
+    def _rolling(self) -> dict[str, Any]:
+        return self.recent.stats(int(dt_util.utcnow().timestamp() * 1000))
+
+    async def on_external_sample(self, sample: dict[str, Any]) -> None:
+        """Accept external sample (e.g. from HA entity) and run decision."""
+        try:
+            self.persisted_state.last_sample = dict(sample)
+        except Exception:
+            pass
+        try:
+            await self.sample_logger.async_append(sample)
+            await self.rollups.async_add(sample)
+            self.recent.push(sample)
+        except Exception:
+            pass
+        try:
+            await self._pump_auto_if_needed(sample)
+        except Exception:
+            pass
+        try:
+            await self._update_totals_if_dirty()
+        except Exception:
+            pass
 
     async def poll_once(self) -> dict[str, Any]:
         cfg = self.cfg
@@ -515,7 +1700,7 @@ async def on_external_sample(self, sample: dict[str, Any]) -> None:
                 'station': 'ha_entity',
                 'pollSeconds': self.poll_seconds,
                 'epoch': int(dt_util.utcnow().timestamp()),
-                'slot': {'status': 'ok', 'last': last, 'pumpTotals': self.pump_totals},
+                'slot': {'status': 'ok', 'last': last, 'pumpTotals': self.pump_totals, 'rolling': self._rolling()},
             }
 
         if not self.enabled:
@@ -525,7 +1710,7 @@ async def on_external_sample(self, sample: dict[str, Any]) -> None:
                 "station": (self.client.station if self.client else getattr(self, "station", "")),
                 "pollSeconds": self.poll_seconds,
                 "epoch": int(dt_util.utcnow().timestamp()),
-                "slot": {"status": "disabled", "last": {}, "pumpTotals": self.pump_totals},
+                "slot": {"status": "disabled", "last": {}, "pumpTotals": self.pump_totals, "rolling": self._rolling()},
             }
 
         device_eui = (cfg.get("deviceEui") or "").strip()
@@ -536,18 +1721,34 @@ async def on_external_sample(self, sample: dict[str, Any]) -> None:
                 "station": (self.client.station if self.client else getattr(self, "station", "")),
                 "pollSeconds": self.poll_seconds,
                 "epoch": int(dt_util.utcnow().timestamp()),
-                "slot": {"status": "missing deviceEui", "last": {}, "pumpTotals": self.pump_totals},
+                "slot": {"status": "missing deviceEui", "last": {}, "pumpTotals": self.pump_totals, "rolling": self._rolling()},
             }
 
         channel_index = int(cfg.get("channelIndex", 1) or 1)
 
-        results = {}
-        errs = []
-        for key, mid in MEASUREMENT_IDS.items():
-            fr = await self.client.fetch_latest(device_eui, channel_index, mid)
-            results[key] = fr
-            if fr.err:
-                errs.append(fr.err)
+        decided = False
+
+        async def _on_moist(fr: FetchResult) -> None:
+            # moisture-first: decide before the slower measurements are back
+            nonlocal decided
+            if fr.ok and fr.value is not None and int(fr.ts_ms) > self.persisted_state.last_written_ts_ms:
+                decided = True
+                await self._pump_auto_if_needed({"t": int(fr.ts_ms), "moist": fr.value})
+
+        retry_in = self.client.breaker_retry_in()
+        if retry_in is not None:
+            # breaker open: don't even start the fetch chain
+            await self._update_totals_if_dirty()
+            return {
+                "enabled": True,
+                "station": self.client.station,
+                "pollSeconds": self.poll_seconds,
+                "epoch": int(dt_util.utcnow().timestamp()),
+                "slot": {"status": f"cloud unavailable (retry in {int(math.ceil(retry_in))}s)", "last": {}, "pumpTotals": self.pump_totals, "rolling": self._rolling()},
+            }
+
+        results = await self.async_fetch_device(device_eui, channel_index, _on_moist, tiered=True)
+        errs = [fr.err for fr in results.values() if fr.err]
 
         if not any(fr.ok for fr in results.values()):
             err = errs[0] if errs else "no data"
@@ -557,29 +1758,35 @@ async def on_external_sample(self, sample: dict[str, Any]) -> None:
                 "station": (self.client.station if self.client else getattr(self, "station", "")),
                 "pollSeconds": self.poll_seconds,
                 "epoch": int(dt_util.utcnow().timestamp()),
-                "slot": {"status": err, "last": {}, "pumpTotals": self.pump_totals},
+                "slot": {"status": err, "last": {}, "pumpTotals": self.pump_totals, "rolling": self._rolling()},
             }
 
         ts = 0
-        for fr in results.values():
+        for key, fr in results.items():
             if fr.ok:
                 ts = max(ts, int(fr.ts_ms))
-
-        last = {
-            "t": ts,
-            "temp": results["soilTemp"].value if results["soilTemp"].ok else None,
-            "moist": results["soilMoist"].value if results["soilMoist"].ok else None,
-            "ec": results["soilEc"].value if results["soilEc"].ok else None,
-            "wec": results["waterEc"].value if results["waterEc"].ok else None,
-            "eps": results["epsilon"].value if results["epsilon"].ok else None,
-            "ch": channel_index,
-        }
+                self._metric_cache[key] = fr
+        if ts > 0:
+            self.cadence.observe(ts, int(dt_util.utcnow().timestamp() * 1000))
+
+        # logged sample: only what was fetched this poll; last (sensors): cached values in between
+        fresh = {k: (results[key].value if key in results and results[key].ok else None) for k, key in SAMPLE_KEYS.items()}
+        fresh = {"t": ts, **fresh, "ch": channel_index}
+        last = dict(fresh)
+        for k, key in SAMPLE_KEYS.items():
+            if last[k] is None and key in self._metric_cache:
+                last[k] = self._metric_cache[key].value
 
         if ts > 0 and ts > self.persisted_state.last_written_ts_ms:
             self.persisted_state.last_written_ts_ms = ts
             self.persisted_state.last_sample = dict(last)
-            await self.sample_logger.async_append(last)
-            await self._pump_auto_if_needed(last)
+            await self.sample_logger.async_append(fresh)
+            await self.rollups.async_add(fresh)
+            self.recent.push(fresh)
+            if not decided:
+                # decide on moisture fetched this poll only; a cached value (slowMetricEvery,
+                # negative cache) could water on a reading that is already stale
+                await self._pump_auto_if_needed({**last, "moist": fresh["moist"]})
 
         await self._update_totals_if_dirty()
 
@@ -587,6 +1794,7 @@ async def on_external_sample(self, sample: dict[str, Any]) -> None:
             "enabled": True,
             "station": (self.client.station if self.client else getattr(self, "station", "")),
             "pollSeconds": self.poll_seconds,
+            "uploadPeriodS": (self.cadence.period_ms // 1000) if self.cadence.period_ms else None,
             "epoch": int(dt_util.utcnow().timestamp()),
-            "slot": {"status": "ok", "last": last, "pumpTotals": self.pump_totals},
+            "slot": {"status": "ok", "last": last, "pumpTotals": self.pump_totals, "rolling": self._rolling()},
         }
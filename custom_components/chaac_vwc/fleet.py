@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .controller import SAMPLE_KEYS
+
+LOGGER = logging.getLogger(__name__)
+
+FLEET_MAX_DEVICES = 64
+FLEET_MIN_TICK_S = 1.0
+
+
+@dataclass(frozen=True)
+class FleetDevice:
+    eui: str
+    channel: int = 1
+    name: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.eui}:{self.channel}"
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.eui} ch{self.channel}"
+
+
+def parse_fleet_devices(spec: str, exclude: tuple[str, int] | None = None) -> list[FleetDevice]:
+    """ "EUI[:channel][=name]" separated by commas, semicolons or newlines; duplicates dropped."""
+    out: list[FleetDevice] = []
+    seen: set[str] = set()
+    for part in re.split(r"[,;\n]+", spec or ""):
+        part = part.strip()
+        if not part:
+            continue
+        ident, _, name = part.partition("=")
+        eui, _, ch = ident.strip().partition(":")
+        eui = eui.strip().upper()
+        try:
+            channel = int(ch) if ch.strip() else 1
+        except ValueError:
+            LOGGER.warning("Fleet: ignoring %r (bad channel)", part)
+            continue
+        dev = FleetDevice(eui, channel, name.strip())
+        if not eui or dev.key in seen or (exclude and (eui, channel) == (exclude[0].upper(), exclude[1])):
+            continue
+        seen.add(dev.key)
+        out.append(dev)
+    if len(out) > FLEET_MAX_DEVICES:
+        LOGGER.warning("Fleet: %s devices configured, only the first %s are polled", len(out), FLEET_MAX_DEVICES)
+    return out[:FLEET_MAX_DEVICES]
+
+
+class FleetPoller:
+    """Polls extra devices of the same account with the controller's client, one device per tick.
+
+    The tick is pollSeconds / len(devices), so every device is fetched once per pollSeconds and
+    the requests are spread evenly instead of all firing at the same moment.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, controller: Any, devices: list[FleetDevice], poll_seconds: int) -> None:
+        self.hass = hass
+        self.controller = controller
+        self.devices = devices
+        self.poll_seconds = max(10, int(poll_seconds))
+        self.tick_s = max(FLEET_MIN_TICK_S, self.poll_seconds / max(1, len(devices)))
+        # key -> {"status", "last", "epoch"}
+        self.data: dict[str, dict[str, Any]] = {d.key: {"status": "pending", "last": {}, "epoch": 0} for d in devices}
+        self.coordinator: DataUpdateCoordinator = DataUpdateCoordinator(
+            hass, logger=LOGGER, name=f"{DOMAIN}_{entry_id}_fleet"
+        )
+        self.coordinator.async_set_updated_data(dict(self.data))
+        self._next = 0
+        self._inflight: asyncio.Task | None = None
+        self._unsub: Any = None
+
+    def async_start(self) -> None:
+        if not self.devices:
+            return
+        self._unsub = async_track_time_interval(self.hass, self._async_tick, timedelta(seconds=self.tick_s))
+        LOGGER.debug("Fleet: %s device(s), one poll every %.1fs", len(self.devices), self.tick_s)
+
+    async def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+            await asyncio.gather(self._inflight, return_exceptions=True)
+
+    async def _async_tick(self, _now) -> None:
+        if self._inflight is not None and not self._inflight.done():
+            return  # previous device still fetching (slow cloud); keep the spacing
+        dev = self.devices[self._next % len(self.devices)]
+        self._next += 1
+        self._inflight = self.hass.async_create_task(self._async_poll(dev))
+
+    async def _async_poll(self, dev: FleetDevice) -> None:
+        client = self.controller.client
+        retry_in = client.breaker_retry_in()
+        if retry_in is not None:
+            status, last = f"cloud unavailable (retry in {int(math.ceil(retry_in))}s)", None
+        else:
+            try:
+                results = await self.controller.async_fetch_device(dev.eui, dev.channel)
+            except Exception as e:
+                results = {}
+                LOGGER.debug("Fleet: %s fetch failed: %s", dev.key, e)
+            if any(fr.ok for fr in results.values()):
+                ts = max(int(fr.ts_ms) for fr in results.values() if fr.ok)
+                last = {"t": ts, "ch": dev.channel}
+                for k, key in SAMPLE_KEYS.items():
+                    fr = results.get(key)
+                    last[k] = fr.value if fr is not None and fr.ok else None
+                status = "ok"
+            else:
+                last = None
+                status = next((fr.err for fr in results.values() if fr.err), "no data")
+        prev = self.data.get(dev.key, {})
+        self.data[dev.key] = {
+            "status": status,
+            # keep the last good values on errors; status tells the rest
+            "last": last if last is not None else prev.get("last", {}),
+            "epoch": int(dt_util.utcnow().timestamp()),
+        }
+        self.coordinator.async_set_updated_data(dict(self.data))
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pump_events ("
+    " ts_ms INTEGER NOT NULL, ml REAL NOT NULL, sec REAL NOT NULL, phase TEXT, mode TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_pump_events_ts ON pump_events (ts_ms)",
+    # daily rollup, day = local YYYYMMDD as integer -> any window is one range scan over the PK
+    "CREATE TABLE IF NOT EXISTS pump_daily ("
+    " day INTEGER PRIMARY KEY, ml REAL NOT NULL, sec REAL NOT NULL, n INTEGER NOT NULL)",
+)
+
+_UPSERT_DAILY = (
+    "INSERT INTO pump_daily (day, ml, sec, n) VALUES (?, ?, ?, 1) "
+    "ON CONFLICT(day) DO UPDATE SET ml = ml + excluded.ml, sec = sec + excluded.sec, n = n + 1"
+)
+
+
+class PumpEventStore:
+    """Optional SQLite pump history; all sqlite calls run in the executor, one at a time."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        self.hass = hass
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def _run(self, fn, *args) -> Any:
+        async with self._lock:
+            return await self.hass.async_add_executor_job(fn, *args)
+
+    def _open(self) -> bool:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        conn.commit()
+        self._conn = conn
+        return conn.execute("SELECT 1 FROM pump_events LIMIT 1").fetchone() is None
+
+    async def async_open(self) -> bool:
+        """Open/create the database; True if it has no events yet (caller may backfill)."""
+        return bool(await self._run(self._open))
+
+    def _add_many(self, rows: list[tuple[int, int, float, float, str, str]]) -> None:
+        if self._conn is None:
+            return
+        with self._conn:
+            for day, ts_ms, ml, sec, phase, mode in rows:
+                self._conn.execute(
+                    "INSERT INTO pump_events (ts_ms, ml, sec, phase, mode) VALUES (?, ?, ?, ?, ?)",
+                    (ts_ms, ml, sec, phase, mode),
+                )
+                self._conn.execute(_UPSERT_DAILY, (day, ml, sec))
+
+    async def async_add(self, day: int, ts_ms: int, ml: float, sec: float, phase: str, mode: str) -> None:
+        await self._run(self._add_many, [(int(day), int(ts_ms), float(ml), float(sec), phase, mode)])
+
+    async def async_add_many(self, rows: list[tuple[int, int, float, float, str, str]]) -> None:
+        if rows:
+            await self._run(self._add_many, rows)
+
+    def _totals_since(self, start_days: dict[str, int]) -> dict[str, tuple[float, float]]:
+        out: dict[str, tuple[float, float]] = {}
+        if self._conn is None:
+            return out
+        for key, start_day in start_days.items():
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(ml), 0), COALESCE(SUM(sec), 0) FROM pump_daily WHERE day >= ?",
+                (int(start_day),),
+            ).fetchone()
+            out[key] = (float(row[0]), float(row[1]))
+        return out
+
+    async def async_totals_since(self, start_days: dict[str, int]) -> dict[str, tuple[float, float]]:
+        """{window: (ml, sec)} summed from each window's first local day (YYYYMMDD) up to today."""
+        return await self._run(self._totals_since, start_days)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def async_close(self) -> None:
+        await self._run(self._close)
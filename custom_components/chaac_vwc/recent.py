@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any
+
+from .const import METRICS
+
+# Fixed-capacity ring of the most recent samples (preallocated arrays, nothing grows per sample).
+# Rolling mean via running sums, min/max via monotonic index queues, moisture slope via running
+# least-squares sums; all O(1) amortized per sample. Sums are rebuilt from the ring every
+# `capacity` pushes so float drift from add/subtract cannot accumulate.
+RECENT_CAPACITY = 4096
+SLOPE_METRIC = "moist"
+
+_NAN = float("nan")
+_MS_PER_HOUR = 3600000.0
+
+
+class _MonoQueue:
+    """Sequence numbers of window candidates for min (sign=1) or max (sign=-1), best first."""
+
+    __slots__ = ("seqs", "head", "tail", "sign")
+
+    def __init__(self, capacity: int, sign: float) -> None:
+        self.seqs = array("q", bytes(8 * capacity))
+        self.head = 0
+        self.tail = 0
+        self.sign = sign
+
+
+class RecentSamples:
+    def __init__(self, hours: float, capacity: int = RECENT_CAPACITY) -> None:
+        self.hours = float(hours)
+        self.window_ms = int(self.hours * _MS_PER_HOUR)
+        self.capacity = int(capacity)
+        cap = self.capacity
+        self._t = array("q", bytes(8 * cap))
+        self._v = {k: array("d", [_NAN]) * cap for k in METRICS}
+        self._min = {k: _MonoQueue(cap, 1.0) for k in METRICS}
+        self._max = {k: _MonoQueue(cap, -1.0) for k in METRICS}
+        self._sum = dict.fromkeys(METRICS, 0.0)
+        self._n = dict.fromkeys(METRICS, 0)
+        # slope sums over x = hours since _x0_ms
+        self._x0_ms = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._sn = 0
+        # sequence numbers: oldest held sample is _start, next push gets _end; slot = seq % capacity
+        self._start = 0
+        self._end = 0
+        self._since_rebuild = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_t(self) -> int:
+        return self._t[(self._end - 1) % self.capacity] if self._end > self._start else 0
+
+    def push(self, sample: dict[str, Any]) -> bool:
+        """Add a sample; older-or-equal timestamps are ignored (the ring is kept in time order)."""
+        t = int(sample.get("t", 0) or 0)
+        if t <= 0 or t <= self.last_t:
+            return False
+        if self._end - self._start == self.capacity:
+            self._evict()
+        self.evict_before(t - self.window_ms)
+
+        seq = self._end
+        i = seq % self.capacity
+        self._t[i] = t
+        if self._start == self._end:
+            self._x0_ms = t
+        for k, vals in self._v.items():
+            v = sample.get(k)
+            try:
+                v = _NAN if v is None else float(v)
+            except (TypeError, ValueError):
+                v = _NAN
+            vals[i] = v
+            if math.isnan(v):
+                continue
+            self._sum[k] += v
+            self._n[k] += 1
+            self._queue_push(self._min[k], vals, seq, v)
+            self._queue_push(self._max[k], vals, seq, v)
+            if k == SLOPE_METRIC:
+                x = (t - self._x0_ms) / _MS_PER_HOUR
+                self._sx += x
+                self._sy += v
+                self._sxx += x * x
+                self._sxy += x * v
+                self._sn += 1
+        self._end += 1
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.capacity:
+            self._rebuild()
+        return True
+
+    def evict_before(self, t_min: int) -> None:
+        while self._end > self._start and self._t[self._start % self.capacity] < t_min:
+            self._evict()
+
+    def _queue_push(self, q: _MonoQueue, vals: array, seq: int, v: float) -> None:
+        cap = self.capacity
+        while q.tail > q.head and q.sign * vals[q.seqs[(q.tail - 1) % cap] % cap] >= q.sign * v:
+            q.tail -= 1
+        q.seqs[q.tail % cap] = seq
+        q.tail += 1
+
+    def _evict(self) -> None:
+        seq = self._start
+        i = seq % self.capacity
+        t = self._t[i]
+        for k, vals in self._v.items():
+            v = vals[i]
+            if math.isnan(v):
+                continue
+            self._sum[k] -= v
+            self._n[k] -= 1
+            for q in (self._min[k], self._max[k]):
+                if q.tail > q.head and q.seqs[q.head % self.capacity] == seq:
+                    q.head += 1
+            if k == SLOPE_METRIC:
+                x = (t - self._x0_ms) / _MS_PER_HOUR
+                self._sx -= x
+                self._sy -= v
+                self._sxx -= x * x
+                self._sxy -= x * v
+                self._sn -= 1
+        self._start += 1
+
+    def _rebuild(self) -> None:
+        """Recompute the running sums from the ring and move the slope origin to the oldest sample."""
+        self._since_rebuild = 0
+        cap = self.capacity
+        self._x0_ms = self._t[self._start % cap] if self._end > self._start else 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._sn = 0
+        for k, vals in self._v.items():
+            total, n = 0.0, 0
+            for seq in range(self._start, self._end):
+                v = vals[seq % cap]
+                if math.isnan(v):
+                    continue
+                total += v
+                n += 1
+                if k == SLOPE_METRIC:
+                    x = (self._t[seq % cap] - self._x0_ms) / _MS_PER_HOUR
+                    self._sx += x
+                    self._sy += v
+                    self._sxx += x * x
+                    self._sxy += x * v
+                    self._sn += 1
+            self._sum[k] = total
+            self._n[k] = n
+
+    def slope_per_hour(self) -> float | None:
+        n = self._sn
+        if n < 2:
+            return None
+        den = n * self._sxx - self._sx * self._sx
+        if den <= 1e-12:
+            return None
+        return (n * self._sxy - self._sx * self._sy) / den
+
+    def stats(self, now_ms: int | None = None) -> dict[str, Any]:
+        """{"hours", "n", <metric>: {"mean", "min", "max"} | None, "moistSlope": unit/h | None}."""
+        if now_ms is not None:
+            self.evict_before(now_ms - self.window_ms)
+        cap = self.capacity
+        out: dict[str, Any] = {"hours": self.hours, "n": len(self)}
+        for k, vals in self._v.items():
+            n = self._n[k]
+            if n <= 0:
+                out[k] = None
+                continue
+            qmin, qmax = self._min[k], self._max[k]
+            out[k] = {
+                "mean": round(self._sum[k] / n, 3),
+                "min": vals[qmin.seqs[qmin.head % cap] % cap],
+                "max": vals[qmax.seqs[qmax.head % cap] % cap],
+            }
+        slope = self.slope_per_hour()
+        out["moistSlope"] = round(slope, 3) if slope is not None else None
+        return out
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, Iterator
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; plain struct/array fallback below
+    np = None
+
+# Daily sample segment: 32-byte header + fixed-width little-endian records.
+#   header: magic, version, record size, day start (epoch ms), reserved
+#   record: t (epoch ms), temp, moist, ec, wec, eps (float32, NaN = missing), ch
+MAGIC = b"CVWC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHq16x")
+RECORD = struct.Struct("<q5fi")
+FIELDS = ("t", "temp", "moist", "ec", "wec", "eps", "ch")
+VALUE_FIELDS = FIELDS[1:6]
+
+NP_DTYPE = None
+if np is not None:
+    NP_DTYPE = np.dtype([
+        ("t", "<i8"), ("temp", "<f4"), ("moist", "<f4"), ("ec", "<f4"),
+        ("wec", "<f4"), ("eps", "<f4"), ("ch", "<i4"),
+    ])
+
+
+def encode_header(day_start_ms: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, RECORD.size, int(day_start_ms))
+
+
+def _f(v: Any) -> float:
+    try:
+        return float(v) if v is not None else float("nan")
+    except Exception:
+        return float("nan")
+
+
+def encode_record(sample: dict[str, Any]) -> bytes:
+    return RECORD.pack(
+        int(sample.get("t", 0) or 0),
+        *(_f(sample.get(k)) for k in VALUE_FIELDS),
+        int(sample.get("ch", 0) or 0),
+    )
+
+
+def decode_record(rec: tuple) -> dict[str, Any]:
+    out: dict[str, Any] = {"t": int(rec[0])}
+    for k, v in zip(VALUE_FIELDS, rec[1:6]):
+        out[k] = None if v != v else round(float(v), 4)  # float32 -> trim representation noise
+    out["ch"] = int(rec[6])
+    return out
+
+
+def truncate_torn_tail(f) -> int:
+    """Cut a torn trailing record (crash mid-write) off a segment opened for append.
+
+    Without this the next record would start mid-record and everything after it in the segment
+    would decode as garbage. A torn header empties the file so the header is written again.
+    Returns the number of bytes removed.
+    """
+    size = os.fstat(f.fileno()).st_size
+    good = 0 if size < HEADER.size else HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+    if good != size:
+        f.truncate(good)
+        f.seek(good)
+    return size - good
+
+
+class SampleSegment:
+    """Read-only mmap view of one segment; use as a context manager and drop views before exit."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+        self.day_start_ms = 0
+        self._f = None
+        self._mm: mmap.mmap | None = None
+
+    def __enter__(self) -> "SampleSegment":
+        self._f = open(self.path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        if size < HEADER.size:
+            return self
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rec_size, day_start_ms = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rec_size != RECORD.size:
+            raise ValueError(f"not a sample segment: {self.path}")
+        self.day_start_ms = int(day_start_ms)
+        # a torn trailing record (crash mid-write) is ignored
+        self.count = (size - HEADER.size) // RECORD.size
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # a caller still holds a view; the map goes away with it
+            self._mm = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def _body(self, start: int = 0, stop: int | None = None) -> memoryview:
+        stop = self.count if stop is None else max(start, min(self.count, stop))
+        return memoryview(self._mm)[HEADER.size + start * RECORD.size: HEADER.size + stop * RECORD.size]
+
+    def t_at(self, i: int) -> int:
+        return RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)[0]
+
+    def lower_bound(self, t_ms: int) -> int:
+        """Index of the first record with t >= t_ms (records are appended in time order)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.t_at(mid) < t_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, start: int = 0, stop: int | None = None) -> Iterator[tuple]:
+        if self._mm is None or self.count == 0:
+            return iter(())
+        return RECORD.iter_unpack(self._body(start, stop))
+
+    def array(self):
+        """Zero-copy NumPy structured view (None without numpy)."""
+        if np is None or self._mm is None:
+            return None
+        return np.frombuffer(self._mm, dtype=NP_DTYPE, count=self.count, offset=HEADER.size)
+
+    def columns(self) -> dict[str, Any]:
+        """Per-field columns: NumPy views when available, otherwise array copies."""
+        arr = self.array()
+        if arr is not None:
+            return {k: arr[k] for k in FIELDS}
+        cols: dict[str, Any] = {"t": array("q"), "ch": array("i")}
+        for k in VALUE_FIELDS:
+            cols[k] = array("f")
+        for rec in self.records():
+            for k, v in zip(FIELDS, rec):
+                cols[k].append(v)
+        return cols
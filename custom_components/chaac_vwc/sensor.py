@@ -26,9 +26,19 @@ async def async_setup_entry(hass, entry: ConfigEntry, async_add_entities: AddEnt
 
     for k in METRICS.keys():
         entities.append(MetricSensor(coordinator, entry, k))
+    entities.append(MoistureTrendSensor(coordinator, entry))
 
     entities.append(PumpTotalSensor(coordinator, entry, days=1))
     entities.append(PumpTotalSensor(coordinator, entry, days=7))
+    for window in hass.data[DOMAIN][entry.entry_id]["controller"].pump_windows:
+        entities.append(PumpTotalSensor(coordinator, entry, window=window))
+
+    fleet = hass.data[DOMAIN][entry.entry_id].get("fleet")
+    if fleet is not None:
+        for dev in fleet.devices:
+            entities.append(FleetStatusSensor(fleet.coordinator, entry, dev))
+            for k in METRICS.keys():
+                entities.append(FleetMetricSensor(fleet.coordinator, entry, dev, k))
 
     async_add_entities(entities)
 
@@ -70,6 +80,47 @@ class MetricSensor(_Base):
         key = {"temp": "temp", "moist": "moist", "ec": "ec", "wec": "wec", "eps": "eps"}[self.metric]
         return last.get(key)
 
+    @property
+    def extra_state_attributes(self):
+        s = _slot(self.coordinator.data)
+        rolling = s.get("rolling") if isinstance(s, dict) else None
+        if not isinstance(rolling, dict) or not isinstance(rolling.get(self.metric), dict):
+            return None
+        st = rolling[self.metric]
+        return {
+            "rolling_hours": rolling.get("hours"),
+            "rolling_mean": st.get("mean"),
+            "rolling_min": st.get("min"),
+            "rolling_max": st.get("max"),
+        }
+
+
+class MoistureTrendSensor(_Base):
+    """Least-squares slope of soil moisture over the rolling window."""
+
+    _attr_icon = "mdi:trending-up"
+    _attr_native_unit_of_measurement = "%/h"
+    _attr_state_class = "measurement"
+
+    def __init__(self, coordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_name = "Soil Moisture Trend"
+        self._attr_unique_id = f"{entry.entry_id}_moist_slope"
+
+    @property
+    def native_value(self):
+        s = _slot(self.coordinator.data)
+        rolling = s.get("rolling") if isinstance(s, dict) else None
+        return rolling.get("moistSlope") if isinstance(rolling, dict) else None
+
+    @property
+    def extra_state_attributes(self):
+        s = _slot(self.coordinator.data)
+        rolling = s.get("rolling") if isinstance(s, dict) else None
+        if not isinstance(rolling, dict):
+            return None
+        return {"rolling_hours": rolling.get("hours"), "samples": rolling.get("n")}
+
 
 class StatusSensor(_Base):
     _attr_icon = "mdi:information-outline"
@@ -84,6 +135,17 @@ class StatusSensor(_Base):
         s = _slot(self.coordinator.data)
         return s.get("status") if isinstance(s, dict) else None
 
+    @property
+    def extra_state_attributes(self):
+        data = self.coordinator.data
+        if not isinstance(data, dict) or data.get("uploadPeriodS") is None:
+            return None
+        interval = self.coordinator.update_interval
+        return {
+            "upload_period_s": data.get("uploadPeriodS"),
+            "next_poll_s": round(interval.total_seconds()) if interval else None,
+        }
+
 
 class LastUpdateSensor(_Base):
     _attr_device_class = "timestamp"
@@ -110,11 +172,12 @@ class PumpTotalSensor(_Base):
     _attr_icon = "mdi:water"
     _attr_native_unit_of_measurement = "ml"
 
-    def __init__(self, coordinator, entry: ConfigEntry, days: int):
+    def __init__(self, coordinator, entry: ConfigEntry, days: int = 0, window: str = ""):
         super().__init__(coordinator, entry)
-        self.days = int(days)
-        self._attr_name = f"Watered {self.days}d"
-        self._attr_unique_id = f"{entry.entry_id}_watered_{self.days}d"
+        # window: "30d", "season", ... (pump history database); days: the built-in 1d/7d totals
+        self.window = window or f"{int(days)}d"
+        self._attr_name = f"Watered {self.window}"
+        self._attr_unique_id = f"{entry.entry_id}_watered_{self.window}"
 
     @property
     def native_value(self):
@@ -124,8 +187,83 @@ class PumpTotalSensor(_Base):
         pt = s.get("pumpTotals")
         if not isinstance(pt, dict):
             return 0.0
-        v = pt.get(f"{self.days}d")
+        v = pt.get(self.window)
         try:
             return float(v or 0.0)
         except Exception:
             return 0.0
+
+    @property
+    def extra_state_attributes(self):
+        s = _slot(self.coordinator.data)
+        pt = s.get("pumpTotals") if isinstance(s, dict) else None
+        if not isinstance(pt, dict):
+            return None
+        return {"seconds": pt.get(f"{self.window}_sec")}
+
+
+class _FleetBase(CoordinatorEntity, SensorEntity):
+    """Entity of one fleet device; its own HA device, linked to the entry's main device."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, entry: ConfigEntry, dev):
+        super().__init__(coordinator)
+        self.entry = entry
+        self.dev = dev
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"{self.entry.entry_id}_{self.dev.key}")},
+            name=f"Chaac VWC {self.dev.label}",
+            manufacturer="Chaac",
+            model="SenseCAP VWC (Fleet)",
+            via_device=(DOMAIN, self.entry.entry_id),
+        )
+
+    def _dev_data(self) -> dict[str, Any]:
+        data = self.coordinator.data
+        d = data.get(self.dev.key) if isinstance(data, dict) else None
+        return d if isinstance(d, dict) else {}
+
+
+class FleetMetricSensor(_FleetBase):
+    def __init__(self, coordinator, entry: ConfigEntry, dev, metric: str):
+        super().__init__(coordinator, entry, dev)
+        meta = METRICS[metric]
+        self.metric = metric
+        self._attr_name = meta["name"]
+        self._attr_unique_id = f"{entry.entry_id}_{dev.key}_{metric}"
+        self._attr_native_unit_of_measurement = meta.get("unit")
+        self._attr_device_class = meta.get("device_class")
+        self._attr_state_class = meta.get("state_class")
+
+    @property
+    def native_value(self):
+        last = self._dev_data().get("last")
+        return last.get(self.metric) if isinstance(last, dict) else None
+
+
+class FleetStatusSensor(_FleetBase):
+    _attr_icon = "mdi:information-outline"
+
+    def __init__(self, coordinator, entry: ConfigEntry, dev):
+        super().__init__(coordinator, entry, dev)
+        self._attr_name = "Status"
+        self._attr_unique_id = f"{entry.entry_id}_{dev.key}_status"
+
+    @property
+    def native_value(self):
+        return self._dev_data().get("status")
+
+    @property
+    def extra_state_attributes(self):
+        d = self._dev_data()
+        last = d.get("last")
+        t = last.get("t") if isinstance(last, dict) else None
+        return {
+            "device_eui": self.dev.eui,
+            "channel_index": self.dev.channel,
+            "last_update": datetime.fromtimestamp(t / 1000.0, tz=timezone.utc).isoformat() if isinstance(t, (int, float)) and t > 0 else None,
+        }
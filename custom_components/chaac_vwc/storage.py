@@ -1,19 +1,73 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from dataclasses import dataclass, field
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.storage import Store
 
+LOGGER = logging.getLogger(__name__)
+
 STORE_VERSION = 1
-STORE_KEY = "chaac_vwc_state_single"
+# one store per config entry: f"{STORE_KEY_PREFIX}{entry_id}"
+STORE_KEY_PREFIX = "chaac_vwc_state_"
+# pre-sharding global key; migrated into the first entry that loads and then removed
+LEGACY_STORE_KEY = "chaac_vwc_state_single"
+DATA_MIGRATE_LOCK = "chaac_vwc_store_migrate_lock"
+# dirty state is written at most this often; unload/shutdown flush immediately
+STORE_SAVE_DELAY_S = 60
+
+def _pump_days_from(v: Any) -> dict[str, dict[str, float]] | None:
+    # None = missing or corrupt -> controller rebuilds the counters from the pump JSONL files
+    if not isinstance(v, dict):
+        return None
+    out: dict[str, dict[str, float]] = {}
+    try:
+        for day, c in v.items():
+            if not isinstance(day, str) or len(day) != 8 or not day.isdigit() or not isinstance(c, dict):
+                return None
+            out[day] = {"ml": float(c.get("ml", 0.0) or 0.0), "sec": float(c.get("sec", 0.0) or 0.0)}
+    except Exception:
+        return None
+    return out
+
+
+def _capabilities_from(v: Any) -> dict[str, dict[str, Any]]:
+    # "<eui>:<channel>" -> {"mids": [measurement ids], "ts": discovery epoch seconds}
+    out: dict[str, dict[str, Any]] = {}
+    if not isinstance(v, dict):
+        return out
+    for key, c in v.items():
+        try:
+            out[str(key)] = {"mids": sorted(int(m) for m in c.get("mids", [])), "ts": int(c.get("ts", 0) or 0)}
+        except Exception:
+            continue
+    return out
+
 
 @dataclass
 class PersistedState:
     last_written_ts_ms: int = 0
     last_pump_ts_ms: int = 0
     last_sample: dict[str, Any] = field(default_factory=dict)
+    # rolling per-day pump counters: "YYYYMMDD" (local) -> {"ml": ..., "sec": ...}
+    pump_days: dict[str, dict[str, float]] | None = None
+    # discovered measurement ids per device channel (see _capabilities_from)
+    capabilities: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.dirty = False
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # any field assignment marks the state dirty; in-place changes (pump_days) call mark_dirty()
+        object.__setattr__(self, name, value)
+        if name != "dirty":
+            object.__setattr__(self, "dirty", True)
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
 
     @staticmethod
     def from_dict(d: dict[str, Any]) -> "PersistedState":
@@ -22,24 +76,76 @@ class PersistedState:
             ps.last_written_ts_ms = int(d.get("last_written_ts_ms", 0) or 0)
             ps.last_pump_ts_ms = int(d.get("last_pump_ts_ms", 0) or 0)
             ps.last_sample = dict(d.get("last_sample", {}) or {})
+            ps.pump_days = _pump_days_from(d.get("pump_days"))
+            ps.capabilities = _capabilities_from(d.get("capabilities"))
         return ps
 
     def to_dict(self) -> dict[str, Any]:
-        return {
+        d = {
             "last_written_ts_ms": self.last_written_ts_ms,
             "last_pump_ts_ms": self.last_pump_ts_ms,
             "last_sample": self.last_sample,
         }
+        if self.pump_days is not None:
+            d["pump_days"] = self.pump_days
+        if self.capabilities:
+            d["capabilities"] = self.capabilities
+        return d
 
 class SenseCapStateStore:
-    def __init__(self, hass: HomeAssistant) -> None:
-        self._store = Store(hass, STORE_VERSION, STORE_KEY)
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store = Store(hass, STORE_VERSION, f"{STORE_KEY_PREFIX}{entry_id}")
         self.state: PersistedState = PersistedState()
+        # a delayed write is queued; re-arming async_delay_save would restart its timer
+        self._save_pending = False
 
     async def async_load(self) -> None:
         data = await self._store.async_load()
+        if data is None:
+            data = await self._async_migrate_legacy()
         if isinstance(data, dict):
             self.state = PersistedState.from_dict(data)
+        self.state.dirty = False
+
+    async def _async_migrate_legacy(self) -> dict[str, Any] | None:
+        # entries may set up concurrently; only one of them may take over the legacy state
+        lock = self.hass.data.setdefault(DATA_MIGRATE_LOCK, asyncio.Lock())
+        async with lock:
+            legacy = Store(self.hass, STORE_VERSION, LEGACY_STORE_KEY)
+            data = await legacy.async_load()
+            if not isinstance(data, dict):
+                return None
+            await self._store.async_save(data)
+            await legacy.async_remove()
+            LOGGER.info("Migrated state from %s to %s", LEGACY_STORE_KEY, self._store.key)
+            return data
+
+    async def async_remove(self) -> None:
+        """Delete this entry's store (config entry removed)."""
+        await self._store.async_remove()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Coalesce writes: no-op if nothing changed, otherwise one write within STORE_SAVE_DELAY_S.
+
+        Changes made while a write is queued go out with that write (the data is taken when it
+        fires), so polls faster than the delay cannot postpone it.
+        """
+        if self.state.dirty and not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, STORE_SAVE_DELAY_S)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        self.state.dirty = False
+        return self.state.to_dict()
+
+    async def async_flush(self) -> None:
+        """Write now if dirty (replaces a pending delayed save)."""
+        if self.state.dirty:
+            await self.async_save()
 
     async def async_save(self) -> None:
-        await self._store.async_save(self.state.to_dict())
+        await self._store.async_save(self._data_to_save())
@@ -0,0 +1,17 @@
+"""Make the integration's Home Assistant-free modules importable as ``chaac_vwc.<module>``.
+
+The package __init__ imports homeassistant, so a bare package is registered in its place; its
+modules still resolve their relative imports (``from .const import ...``) against it.
+"""
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+_PACKAGE_DIR = Path(__file__).resolve().parents[1] / "custom_components" / "chaac_vwc"
+
+if "chaac_vwc" not in sys.modules:
+    _package = types.ModuleType("chaac_vwc")
+    _package.__path__ = [str(_PACKAGE_DIR)]
+    sys.modules["chaac_vwc"] = _package
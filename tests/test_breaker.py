@@ -0,0 +1,121 @@
+"""SenseCAP client circuit breaker (custom_components/chaac_vwc/api.py)."""
+from __future__ import annotations
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from chaac_vwc import api
+
+
+class _Resp:
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+    async def text(self) -> str:
+        return "{}"
+
+    async def __aenter__(self) -> "_Resp":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class _Session:
+    """Answers with the queued statuses; None = connection error."""
+
+    def __init__(self) -> None:
+        self.replies: list[int | None] = []
+        self.calls = 0
+
+    def get(self, url, **kwargs) -> _Resp:
+        self.calls += 1
+        status = self.replies.pop(0)
+        if status is None:
+            raise aiohttp.ClientConnectionError("unreachable")
+        return _Resp(status)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(api.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(api.random, "uniform", lambda lo, hi: hi)  # no jitter
+    return now
+
+
+def _client(session: _Session) -> api.SenseCapCloudClient:
+    return api.SenseCapCloudClient(
+        session=session, station="global", access_id="id", access_key="key",
+        breaker_threshold=3, breaker_base_s=30.0, breaker_max_s=100.0,
+    )
+
+
+def _get(client: api.SenseCapCloudClient) -> tuple[int, object, str]:
+    return asyncio.run(client._get_json("https://example.invalid/x"))
+
+
+def test_opens_after_threshold_and_fails_fast(clock: list[float]) -> None:
+    session = _Session()
+    client = _client(session)
+    session.replies = [503, None, 200, 500, 502, 500]
+
+    for _ in range(3):  # the success resets the count
+        _get(client)
+    assert client.breaker_retry_in() is None
+    for _ in range(3):
+        _get(client)
+
+    assert client.breaker_retry_in() == 30.0
+    assert _get(client) == (0, None, "circuit open")
+    assert session.calls == 6
+
+
+def test_half_open_probe_closes_on_success(clock: list[float]) -> None:
+    session = _Session()
+    client = _client(session)
+    session.replies = [None, None, None, 200, 200]
+    for _ in range(3):
+        _get(client)
+
+    clock[0] += 30.0
+    assert client.breaker_retry_in() is None
+    assert _get(client)[0] == 200
+
+    assert client.breaker_retry_in() is None
+    assert _get(client)[0] == 200
+    assert session.calls == 5
+
+
+def test_failed_probe_reopens_with_longer_backoff(clock: list[float]) -> None:
+    session = _Session()
+    client = _client(session)
+    session.replies = [None, None, None, 500, None, None]
+    for _ in range(3):
+        _get(client)
+
+    clock[0] += 30.0
+    assert _get(client)[0] == 500  # probe fails: 60 s
+    assert client.breaker_retry_in() == 60.0
+    clock[0] += 60.0
+    _get(client)  # 120 s, capped at breaker_max_s
+    assert client.breaker_retry_in() == 100.0
+    clock[0] += 99.0
+    assert _get(client) == (0, None, "circuit open")
+    assert session.calls == 5
+
+
+def test_only_one_probe_while_half_open(clock: list[float]) -> None:
+    session = _Session()
+    client = _client(session)
+    session.replies = [None, None, None]
+    for _ in range(3):
+        _get(client)
+    clock[0] += 30.0
+
+    assert client._breaker_admit()
+    # the probe is in flight: everything else still fails fast
+    assert client.breaker_retry_in() == 0.0
+    assert not client._breaker_admit()
@@ -0,0 +1,67 @@
+"""Upload period and cloud lag learning (custom_components/chaac_vwc/cadence.py)."""
+from __future__ import annotations
+
+from chaac_vwc.cadence import CADENCE_GRACE_S, CADENCE_MIN_DELAY_S, UploadCadence
+
+T0 = 1_700_000_000_000
+MINUTE_MS = 60_000
+
+
+def test_period_is_median_of_upload_intervals() -> None:
+    cad = UploadCadence()
+    ts = T0
+    # 15 min uploads with one missed (30 min) and one retransmit (too short to count)
+    for step in (15, 15, 30, 15, 15):
+        ts += step * MINUTE_MS
+        assert cad.observe(ts, now_ms=ts)
+    assert cad.observe(ts + 10_000, now_ms=ts + 10_000)
+    assert not cad.observe(ts, now_ms=ts + 20_000)
+
+    assert cad.period_ms == 15 * MINUTE_MS
+
+
+def test_no_period_before_two_intervals() -> None:
+    cad = UploadCadence()
+    cad.observe(T0, now_ms=T0)
+    cad.observe(T0 + 10 * MINUTE_MS, now_ms=T0 + 10 * MINUTE_MS)
+
+    assert cad.period_ms is None
+    assert cad.next_poll_s(T0 + 11 * MINUTE_MS, base_s=60) == 60
+
+
+def test_lag_is_smallest_observed_delay() -> None:
+    cad = UploadCadence()
+    for i, lag_s in enumerate((90, 40, 70)):
+        ts = T0 + i * 10 * MINUTE_MS
+        cad.observe(ts, now_ms=ts + lag_s * 1000)
+
+    now = T0 + 20 * MINUTE_MS + 70_000
+    # next upload at +30 min, visible 40 s later, polled after the grace period
+    due_ms = T0 + 30 * MINUTE_MS + 40_000 + CADENCE_GRACE_S * 1000
+    assert cad.next_poll_s(now, base_s=60) == (due_ms - now) / 1000
+
+
+def test_late_upload_grows_lag_and_overdue_probes_at_base() -> None:
+    cad = UploadCadence()
+    for i in range(3):
+        ts = T0 + i * 10 * MINUTE_MS
+        cad.observe(ts, now_ms=ts)
+    last = T0 + 20 * MINUTE_MS
+    due_ms = last + 10 * MINUTE_MS + CADENCE_GRACE_S * 1000
+    assert cad.next_poll_s(last, base_s=60) == (due_ms - last) / 1000
+
+    # polled when due but nothing new yet: the expected lag grows by the grace period
+    assert not cad.observe(last, now_ms=due_ms)
+    assert cad.next_poll_s(due_ms, base_s=60) == CADENCE_GRACE_S
+    # past the (grown) due time: fall back to the base interval until an upload shows up
+    assert cad.next_poll_s(due_ms + 10 * MINUTE_MS, base_s=60) == 60
+
+
+def test_next_poll_never_below_min_delay() -> None:
+    cad = UploadCadence()
+    for i in range(3):
+        ts = T0 + i * MINUTE_MS
+        cad.observe(ts, now_ms=ts)
+    due_ms = T0 + 3 * MINUTE_MS + CADENCE_GRACE_S * 1000
+
+    assert cad.next_poll_s(due_ms - 1000, base_s=60) == CADENCE_MIN_DELAY_S
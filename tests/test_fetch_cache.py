@@ -0,0 +1,106 @@
+"""Single-flight cloud request cache (custom_components/chaac_vwc/api.py SharedFetchCache)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from chaac_vwc.api import SharedFetchCache
+
+KEY = ("latest", "global", "2CF7F1C000000000", 1)
+
+
+class _Request:
+    """A cloud request that blocks until released; records starts and cancellations."""
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "value"
+
+
+def _ok(result: str) -> bool:
+    return result == "value"
+
+
+def test_single_flight_survives_one_cancelled_waiter() -> None:
+    async def main() -> None:
+        cache = SharedFetchCache(ttl_s=60)
+        request = _Request()
+        first = asyncio.ensure_future(cache.get(KEY, request, _ok))
+        second = asyncio.ensure_future(cache.get(KEY, request, _ok))
+        while not request.started:
+            await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        request.release.set()
+
+        assert await second == "value"
+        assert first.cancelled()
+        assert request.started == 1 and request.cancelled == 0
+        # cached for later callers
+        assert await cache.get(KEY, request, _ok) == "value"
+        assert request.started == 1
+
+    asyncio.run(main())
+
+
+def test_last_waiter_leaving_cancels_the_request() -> None:
+    async def main() -> None:
+        cache = SharedFetchCache(ttl_s=60)
+        request = _Request()
+        waiters = [asyncio.ensure_future(cache.get(KEY, request, _ok)) for _ in range(2)]
+        while not request.started:
+            await asyncio.sleep(0)
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert request.cancelled == 1
+
+        # the next caller starts a new request instead of joining the cancelled one
+        request.release.set()
+        assert await cache.get(KEY, request, _ok) == "value"
+        assert request.started == 2
+
+    asyncio.run(main())
+
+
+def test_deadline_on_the_only_waiter_cancels_the_request() -> None:
+    async def main() -> None:
+        cache = SharedFetchCache(ttl_s=60)
+        request = _Request()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get(KEY, request, _ok), timeout=0.01)
+        await asyncio.sleep(0)
+        assert request.cancelled == 1
+
+    asyncio.run(main())
+
+
+def test_close_cancels_in_flight_requests() -> None:
+    async def main() -> None:
+        cache = SharedFetchCache(ttl_s=60)
+        request = _Request()
+        waiter = asyncio.ensure_future(cache.get(KEY, request, _ok))
+        while not request.started:
+            await asyncio.sleep(0)
+
+        await cache.async_close()
+
+        assert request.cancelled == 1
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Rolling window of recent samples (custom_components/chaac_vwc/recent.py)."""
+from __future__ import annotations
+
+import pytest
+
+from chaac_vwc.recent import RecentSamples
+
+T0 = 1_700_000_000_000
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+
+
+def test_ring_evicts_oldest_at_capacity() -> None:
+    ring = RecentSamples(hours=24, capacity=4)
+    for i, moist in enumerate([10.0, 50.0, 20.0, 30.0, 40.0, 25.0]):
+        assert ring.push({"t": T0 + i * MINUTE_MS, "moist": moist})
+
+    stats = ring.stats()
+    # 10 and 50 fell out of the ring
+    assert len(ring) == 4 and stats["n"] == 4
+    assert stats["moist"] == {"mean": 28.75, "min": 20.0, "max": 40.0}
+    assert stats["temp"] is None
+
+
+def test_window_evicts_by_time_and_ignores_out_of_order() -> None:
+    ring = RecentSamples(hours=1, capacity=16)
+    ring.push({"t": T0, "moist": 5.0, "temp": 18.0})
+    ring.push({"t": T0 + 30 * MINUTE_MS, "moist": 15.0})
+    assert not ring.push({"t": T0 + 10 * MINUTE_MS, "moist": 99.0})
+
+    stats = ring.stats(now_ms=T0 + 75 * MINUTE_MS)
+    assert stats["n"] == 1
+    assert stats["moist"] == {"mean": 15.0, "min": 15.0, "max": 15.0}
+    assert stats["temp"] is None
+
+
+def test_min_max_follow_eviction_and_missing_values() -> None:
+    ring = RecentSamples(hours=24, capacity=3)
+    for i, moist in enumerate([30.0, None, 10.0, 20.0, "bad", 25.0]):
+        ring.push({"t": T0 + i * MINUTE_MS, "moist": moist})
+
+    # ring holds 20, "bad", 25: 10 and the missing values are gone or skipped
+    assert ring.stats()["moist"] == {"mean": 22.5, "min": 20.0, "max": 25.0}
+
+
+def test_moisture_slope_per_hour() -> None:
+    ring = RecentSamples(hours=24, capacity=64)
+    assert ring.slope_per_hour() is None
+    for i in range(10):
+        ring.push({"t": T0 + i * HOUR_MS // 2, "moist": 40.0 - 1.5 * i})
+
+    # -1.5 per half hour
+    assert ring.slope_per_hour() == pytest.approx(-3.0)
+    assert ring.stats()["moistSlope"] == -3.0
+
+
+def test_slope_survives_running_sum_rebuild() -> None:
+    ring = RecentSamples(hours=1000, capacity=8)
+    for i in range(50):  # several rebuilds, each moving the slope origin
+        ring.push({"t": T0 + i * HOUR_MS, "moist": 0.25 * i})
+
+    assert ring.slope_per_hour() == pytest.approx(0.25)
+    assert ring.stats()["moist"]["min"] == 0.25 * 42
@@ -0,0 +1,52 @@
+"""Binary sample segments (custom_components/chaac_vwc/samplefile.py)."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from chaac_vwc import samplefile
+
+DAY_MS = 1_700_000_000_000
+
+
+def _append(path: Path, sample: dict) -> None:
+    # what the buffered writer does per segment: open for append, repair, header if new, record
+    with open(path, "ab") as f:
+        samplefile.truncate_torn_tail(f)
+        if f.tell() == 0:
+            f.write(samplefile.encode_header(DAY_MS))
+        f.write(samplefile.encode_record(sample))
+
+
+def _read(path: Path) -> list[dict]:
+    with samplefile.SampleSegment(str(path)) as seg:
+        return [samplefile.decode_record(rec) for rec in seg.records()]
+
+
+def test_append_after_torn_record(tmp_path: Path) -> None:
+    path = tmp_path / "20231114_sensecap.bin"
+    first = {"t": DAY_MS + 1000, "moist": 31.5, "temp": 20.25, "ch": 1}
+    second = {"t": DAY_MS + 2000, "moist": 30.75, "ch": 1}
+    _append(path, first)
+    # crash mid-write: half of the next record reaches the disk
+    with open(path, "ab") as f:
+        f.write(samplefile.encode_record({"t": DAY_MS + 1500, "moist": 99.0, "ch": 1})[: samplefile.RECORD.size // 2])
+
+    _append(path, second)
+
+    rows = _read(path)
+    assert [r["t"] for r in rows] == [first["t"], second["t"]]
+    assert rows[0]["moist"] == 31.5 and rows[0]["temp"] == 20.25
+    assert rows[1]["moist"] == 30.75 and rows[1]["temp"] is None
+    assert path.stat().st_size == samplefile.HEADER.size + 2 * samplefile.RECORD.size
+
+
+def test_torn_header_is_rewritten(tmp_path: Path) -> None:
+    path = tmp_path / "20231114_sensecap.bin"
+    path.write_bytes(samplefile.encode_header(DAY_MS)[:10])
+
+    _append(path, {"t": DAY_MS + 1000, "moist": 12.5, "ch": 2})
+
+    with samplefile.SampleSegment(str(path)) as seg:
+        assert seg.day_start_ms == DAY_MS
+        assert seg.count == 1
+    assert _read(path)[0]["moist"] == 12.5